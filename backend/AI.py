@@ -1,14 +1,57 @@
 from pydantic import BaseModel
 from typing import Optional, List
 import ollama
+import asyncio
 import re
 import os
-from fastapi import APIRouter, HTTPException
+import time
+import logging
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, status
 from datetime import datetime
+from database import get_db
+from jobs import JOB_COLLECTION, Job, job_handler, job_out, schedule_job, submit_job
+from metrics import OllamaTimer
+from tracing import add_llm_time
+
+logger = logging.getLogger("AI")
 
 # AI Router
 ai_router = APIRouter(prefix="/ai", tags=["AI Assistant"])
 
+MODEL_NAME = os.getenv("OLLAMA_MODEL", "gemma3:1b")
+# Generations allowed to run against Ollama at once; the rest wait in line
+OLLAMA_CONCURRENCY = int(os.getenv("OLLAMA_CONCURRENCY", "2"))
+# How long Ollama keeps the model in memory after the last request
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Precomputed patient history summaries, keyed by the patient document id
+SUMMARY_COLLECTION = "patient_summaries"
+# Bump when SUMMARY_PROMPT changes so every summary is regenerated
+SUMMARY_PROMPT_VERSION = 1
+# Summaries generated at once; below OLLAMA_CONCURRENCY to leave room for interactive queries
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "1"))
+# Most recent records sent to the model for one summary
+SUMMARY_MAX_RECORDS = int(os.getenv("SUMMARY_MAX_RECORDS", "50"))
+SUMMARY_BATCH_SIZE = 100
+# Seconds between scheduled summarization runs; 0 leaves them to POST /ai/summaries/refresh
+SUMMARY_INTERVAL_SECONDS = float(os.getenv("SUMMARY_INTERVAL_SECONDS", "0"))
+
+ollama_client = ollama.AsyncClient()
+ollama_slots = asyncio.Semaphore(OLLAMA_CONCURRENCY)
+ollama_timer = OllamaTimer(MODEL_NAME)
+
+# Health-focused system prompt
+SYSTEM_PROMPT = """You are a helpful health information assistant for a hospital management system.
+        Provide accurate general health information and always recommend consulting 
+        with healthcare professionals for personal medical advice.
+        Do not diagnose conditions, prescribe medications, or provide treatment plans.
+        Be clear about the limitations of AI assistance in healthcare.
+        
+        When responding to queries about hospital operations, patient records, or appointments,
+        provide helpful information based on general healthcare best practices.
+        """
+
 class AIQuery(BaseModel):
     query: str
     patient_id: Optional[str] = None
@@ -32,32 +75,66 @@ def postprocess_response(response: str) -> str:
     response = re.sub(r'<.*?>', '', response)
     return response.strip()
 
+async def generate_chat(messages: List[dict]) -> str:
+    """
+    Run a chat generation against Ollama, recording queue wait,
+    time to first token and decode throughput
+    """
+    queued_at = time.perf_counter()
+    try:
+        async with ollama_slots:
+            started_at = time.perf_counter()
+            ollama_timer.queue_wait.observe(started_at - queued_at)
+            ollama_timer.in_flight.inc()
+            try:
+                parts = []
+                first_token_at = None
+                stream = await ollama_client.chat(
+                    model=MODEL_NAME, messages=messages, stream=True, keep_alive=OLLAMA_KEEP_ALIVE
+                )
+                async for chunk in stream:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        ollama_timer.time_to_first_token.observe(first_token_at - started_at)
+                    parts.append(chunk['message']['content'])
+                    if chunk.get('done'):
+                        ollama_timer.observe_tokens(chunk.get('eval_count'), chunk.get('eval_duration'))
+            except Exception:
+                ollama_timer.failed.inc()
+                raise
+            finally:
+                ollama_timer.in_flight.dec()
+                ollama_timer.duration.observe(time.perf_counter() - started_at)
+    finally:
+        # Queue wait counts as LLM time for the request being traced
+        add_llm_time(time.perf_counter() - queued_at)
+    ollama_timer.succeeded.inc()
+    return ''.join(parts)
+
+async def preload_model() -> bool:
+    """
+    Load the model into Ollama's memory at startup so the first query does not pay for it
+    """
+    try:
+        await ollama_client.generate(model=MODEL_NAME, keep_alive=OLLAMA_KEEP_ALIVE)
+        return True
+    except Exception:
+        return False
+
 @ai_router.post("/query", response_model=AIResponse)
 async def query_ai_assistant(query: AIQuery):
     try:
-        # Create a health-focused system prompt
-        system_prompt = """You are a helpful health information assistant for a hospital management system.
-        Provide accurate general health information and always recommend consulting 
-        with healthcare professionals for personal medical advice.
-        Do not diagnose conditions, prescribe medications, or provide treatment plans.
-        Be clear about the limitations of AI assistance in healthcare.
-        
-        When responding to queries about hospital operations, patient records, or appointments,
-        provide helpful information based on general healthcare best practices.
-        """
-        
         # Add patient context if patient_id is provided
         processed_query = preprocess_query(query.query, query.context)
         
         # Check if Ollama is available and model is loaded
         try:
             # Call the Ollama API with the Gemma 3 1B model
-            response = ollama.chat(
-                model='gemma3:1b',
+            assistant_response = await generate_chat(
                 messages=[
                     {
                         'role': 'system',
-                        'content': system_prompt
+                        'content': SYSTEM_PROMPT
                     },
                     {
                         'role': 'user',
@@ -66,13 +143,12 @@ async def query_ai_assistant(query: AIQuery):
                 ]
             )
             
-            # Extract and clean the response
-            assistant_response = response['message']['content']
+            # Clean the response
             cleaned_response = postprocess_response(assistant_response)
             
             return AIResponse(
                 response=cleaned_response,
-                sources=["Gemma 3 1B via Ollama"],
+                sources=[f"{MODEL_NAME} via Ollama"],
                 timestamp=datetime.now()
             )
             
@@ -87,19 +163,41 @@ async def query_ai_assistant(query: AIQuery):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI Assistant error: {str(e)}")
 
+# Find a patient by document id or PatientId; histories and summaries are keyed by the document id
+async def find_patient(db, patient_id: str) -> Optional[dict]:
+    if ObjectId.is_valid(patient_id):
+        patient = await db.patients.find_one({"_id": ObjectId(patient_id)})
+        if patient is not None:
+            return patient
+    return await db.patients.find_one({"PatientId": patient_id})
+
+def format_record(record: dict) -> str:
+    date = record.get('date', 'Unknown date')
+    diagnosis = record.get('diagnosis', 'No diagnosis')
+    treatment = record.get('treatment', 'No treatment')
+    return f"- Date: {date}, Diagnosis: {diagnosis}, Treatment: {treatment}"
+
 # Function to get patient-specific context from the database
 async def get_patient_context(db, patient_id: str) -> str:
     """
-    Retrieve relevant patient information to provide context for AI queries
+    Retrieve relevant patient information to provide context for AI queries.
+    Uses the precomputed history summary when there is one; records added
+    since it was generated (up to SUMMARY_MAX_RECORDS) are appended. Without
+    a summary the last 3 records are used.
     """
     try:
         # Get basic patient info
-        patient = await db.patients.find_one({"PatientId": patient_id})
+        patient = await find_patient(db, patient_id)
         if patient is None:
             return "Patient not found in records."
-        
-        # Get patient history
-        patient_history = await db.patient_history.find_one({"patient_id": patient_id})
+        history_key = str(patient["_id"])
+
+        summary = await db[SUMMARY_COLLECTION].find_one({"_id": history_key})
+        histories = await db.patient_history.aggregate([
+            {"$match": {"patient_id": history_key}},
+            {"$project": history_projection(SUMMARY_MAX_RECORDS if summary else 3)},
+        ]).to_list(1)
+        patient_history = histories[0] if histories else None
         
         context = f"Patient: {patient['name']}, Age: {patient['age']}, Gender: {patient['gender']}"
         
@@ -108,18 +206,22 @@ async def get_patient_context(db, patient_id: str) -> str:
             
         if patient.get('blood_type'):
             context += f"\nBlood Type: {patient['blood_type']}"
+
+        if summary:
+            context += f"\nSummary of medical records: {summary['summary']}"
+            if patient_history and summary.get("history_version") == patient_history.get("version", 0):
+                return context
+            if patient_history:
+                # Records are only ever appended, so those past the summary's count are the new ones;
+                # summaries from before record_count was stored get the last 3
+                added = patient_history["record_count"] - summary.get("record_count", patient_history["record_count"] - 3)
+                patient_history["medical_records"] = patient_history["medical_records"][-added:] if added > 0 else []
         
         if patient_history and patient_history.get('medical_records'):
             # Add recent diagnoses and treatments
-            recent_records = patient_history['medical_records'][-3:]  # Last 3 records
-            context += "\nRecent medical records:"
-            
-            for record in recent_records:
-                date = record.get('date', 'Unknown date')
-                diagnosis = record.get('diagnosis', 'No diagnosis')
-                treatment = record.get('treatment', 'No treatment')
-                
-                context += f"\n- Date: {date}, Diagnosis: {diagnosis}, Treatment: {treatment}"
+            context += "\nMedical records since the summary:" if summary else "\nRecent medical records:"
+            for record in patient_history['medical_records']:
+                context += "\n" + format_record(record)
         
         return context
         
@@ -129,7 +231,7 @@ async def get_patient_context(db, patient_id: str) -> str:
 
 # Add patient-specific query endpoint
 @ai_router.post("/patient/{patient_id}/query", response_model=AIResponse)
-async def query_ai_about_patient(patient_id: str, query: AIQuery, db=None):
+async def query_ai_about_patient(patient_id: str, query: AIQuery, db=Depends(get_db)):
     # Get patient context
     patient_context = await get_patient_context(db, patient_id)
     
@@ -137,4 +239,190 @@ async def query_ai_about_patient(patient_id: str, query: AIQuery, db=None):
     query.context = patient_context
     
     # Process the query with the AI
-    return await query_ai_assistant(query)
\ No newline at end of file
+    return await query_ai_assistant(query)
+
+SUMMARY_PROMPT = """You summarize patient medical records for clinicians.
+Write a compact summary of at most 120 words: chronic conditions, significant
+diagnoses and procedures, current and past medications, allergies or adverse
+reactions, and the trend of recent vital signs. Use plain clinical language,
+no preamble, and do not invent information that is not in the records."""
+
+def history_projection(limit: int) -> dict:
+    # $project for the last limit records of a history and its total record count
+    records = {"$ifNull": ["$medical_records", []]}
+    return {
+        "patient_id": 1,
+        "version": 1,
+        "medical_records": {"$slice": [records, -limit]},
+        "record_count": {"$size": records},
+    }
+
+def summary_stamp(history: dict) -> dict:
+    # A summary is current while the history, the prompt and the model are unchanged
+    return {
+        "history_version": history.get("version", 0),
+        "prompt_version": SUMMARY_PROMPT_VERSION,
+        "model": MODEL_NAME,
+    }
+
+def summary_is_current(summary: Optional[dict], history: dict) -> bool:
+    if summary is None:
+        return False
+    return all(summary.get(field) == value for field, value in summary_stamp(history).items())
+
+async def summarize_history(db, patient: dict, history: dict) -> dict:
+    records = []
+    for record in history.get("medical_records", []):
+        line = format_record(record)
+        if record.get("medication"):
+            line += f", Medication: {', '.join(record['medication'])}"
+        if record.get("vital_signs"):
+            vitals = {name: value for name, value in record["vital_signs"].items() if value is not None}
+            if vitals:
+                line += f", Vitals: {vitals}"
+        if record.get("notes"):
+            line += f", Notes: {record['notes']}"
+        records.append(line)
+
+    header = f"Patient: {patient['name']}, Age: {patient['age']}, Gender: {patient['gender']}"
+    if patient.get("medical_history"):
+        header += f"\nMedical History: {patient['medical_history']}"
+    summary = await generate_chat(
+        messages=[
+            {'role': 'system', 'content': SUMMARY_PROMPT},
+            {'role': 'user', 'content': header + "\nMedical records:\n" + "\n".join(records)},
+        ]
+    )
+    document = {
+        **summary_stamp(history),
+        "summary": postprocess_response(summary),
+        "records": len(records),
+        "record_count": history.get("record_count", len(records)),
+        "generated_at": datetime.now(),
+    }
+    await db[SUMMARY_COLLECTION].replace_one({"_id": history["patient_id"]}, document, upsert=True)
+    return document
+
+async def summarize_batch(db, histories: List[dict], counts: dict, summarize_one):
+    # One query each for the batch's summaries and patients, then generate the stale ones
+    keys = [history["patient_id"] for history in histories]
+    summaries = {
+        summary["_id"]: summary
+        for summary in await db[SUMMARY_COLLECTION].find({"_id": {"$in": keys}}).to_list(None)
+    }
+    patient_ids = [ObjectId(key) for key in keys if ObjectId.is_valid(key)]
+    patients = {
+        str(patient["_id"]): patient
+        for patient in await db.patients.find(
+            {"_id": {"$in": patient_ids}}, {"name": 1, "age": 1, "gender": 1, "medical_history": 1}
+        ).to_list(None)
+    }
+    pending = []
+    for history in histories:
+        patient = patients.get(history["patient_id"])
+        if patient is None or summary_is_current(summaries.get(history["patient_id"]), history):
+            counts["skipped"] += 1
+        else:
+            pending.append(summarize_one(patient, history))
+    await asyncio.gather(*pending)
+
+async def last_summary_run(db) -> Optional[dict]:
+    return await db[JOB_COLLECTION].find_one(
+        {"type": "patients.summarize", "status": "succeeded"},
+        {"started_at": 1, "result": 1},
+        sort=[("started_at", -1)],
+    )
+
+@job_handler("patients.summarize", singleton=True)
+async def summarize_patients_job(db, payload: dict) -> dict:
+    """
+    Summarize the histories changed since the last successful run, or all of
+    them when payload["full"] is set or the model or prompt changed since.
+    Summaries that are still current are skipped, so a retried run resumes.
+    """
+    started_at = datetime.now()
+    query = {}
+    last_run = None if payload.get("full") else await last_summary_run(db)
+    if last_run and (last_run.get("result") or {}).get("stamp") == {"prompt_version": SUMMARY_PROMPT_VERSION, "model": MODEL_NAME}:
+        query["updated_at"] = {"$gte": last_run["started_at"]}
+
+    slots = asyncio.Semaphore(SUMMARY_CONCURRENCY)
+    counts = {"summarized": 0, "skipped": 0, "failed": 0}
+
+    async def summarize_one(patient: dict, history: dict):
+        async with slots:
+            try:
+                await summarize_history(db, patient, history)
+                counts["summarized"] += 1
+            except Exception:
+                logger.exception("Could not summarize history of patient %s", history["patient_id"])
+                counts["failed"] += 1
+
+    cursor = db.patient_history.aggregate(
+        [{"$match": query}, {"$project": history_projection(SUMMARY_MAX_RECORDS)}],
+        batchSize=SUMMARY_BATCH_SIZE,
+    )
+    batch = []
+    async for history in cursor:
+        batch.append(history)
+        if len(batch) == SUMMARY_BATCH_SIZE:
+            await summarize_batch(db, batch, counts, summarize_one)
+            batch = []
+    if batch:
+        await summarize_batch(db, batch, counts, summarize_one)
+
+    if counts["failed"]:
+        # Fail the job so the runner retries; the watermark stays at the last good run
+        raise RuntimeError(f"{counts['failed']} summaries failed, {counts['summarized']} succeeded")
+    return {
+        **counts,
+        "since": query.get("updated_at", {}).get("$gte"),
+        "stamp": {"prompt_version": SUMMARY_PROMPT_VERSION, "model": MODEL_NAME},
+        "duration_seconds": round((datetime.now() - started_at).total_seconds(), 3),
+    }
+
+schedule_job("patients.summarize", SUMMARY_INTERVAL_SECONDS)
+
+@ai_router.get("/patient/{patient_id}/summary")
+async def get_patient_summary(patient_id: str, db=Depends(get_db)):
+    patient = await find_patient(db, patient_id)
+    if patient is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    history_key = str(patient["_id"])
+    summary = await db[SUMMARY_COLLECTION].find_one({"_id": history_key})
+    if summary is None:
+        raise HTTPException(status_code=404, detail="No summary has been generated for this patient")
+    history = await db.patient_history.find_one({"patient_id": history_key}, {"version": 1}) or {}
+    summary["patient_id"] = summary.pop("_id")
+    summary["current"] = summary_is_current(summary, {**history, "patient_id": history_key})
+    return summary
+
+@ai_router.post("/summaries/refresh", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+async def refresh_summaries(full: bool = False, db=Depends(get_db)):
+    # Poll GET /jobs/{id}; the result counts summarized, skipped and failed histories
+    job = await submit_job(db, "patients.summarize", {"full": full}, priority=-1)
+    return job_out(job)
+
+# Background queries: unlike the endpoints above, an unavailable Ollama fails
+# the job so the runner retries it
+@job_handler("ai.query", max_concurrency=OLLAMA_CONCURRENCY, payload_model=AIQuery)
+async def ai_query_job(db, payload: dict) -> dict:
+    context = payload.get("context")
+    if payload.get("patient_id"):
+        context = await get_patient_context(db, payload["patient_id"])
+    assistant_response = await generate_chat(
+        messages=[
+            {'role': 'system', 'content': SYSTEM_PROMPT},
+            {'role': 'user', 'content': preprocess_query(payload["query"], context)},
+        ]
+    )
+    return {
+        "response": postprocess_response(assistant_response),
+        "sources": [f"{MODEL_NAME} via Ollama"],
+    }
+
+@ai_router.post("/jobs", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+async def submit_ai_query(query: AIQuery, db=Depends(get_db)):
+    # Poll GET /jobs/{id}; the answer is in its result once it succeeds
+    job = await submit_job(db, "ai.query", query.model_dump())
+    return job_out(job)
@@ -0,0 +1,324 @@
+import functools
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from pymongo import ReplaceOne, UpdateOne
+from database import get_db
+from jobs import Job, job_handler, job_out, job_pending, submit_job
+
+logger = logging.getLogger("analytics")
+
+analytics_router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+# Daily rollup documents, one per (dimension, key, day):
+#   {"_id": "doctor:D001:2025-04-15", "dimension": "doctor", "key": "D001",
+#    "day": datetime(2025, 4, 15), "count": 12, "statuses": {"completed": 9, "cancelled": 3}}
+# Dimensions: "total" (key "all"), "doctor" (DoctorId) and "specialization".
+ROLLUP_COLLECTION = "analytics_daily"
+
+MAX_RANGE_DAYS = 366
+DEFAULT_RANGE_DAYS = 30
+UNKNOWN = "unknown"
+
+
+def best_effort(func):
+    # Rollup maintenance must never fail the appointment write it follows;
+    # drift is repaired by the next rebuild
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        try:
+            await func(*args, **kwargs)
+        except Exception:
+            logger.exception("Failed to update appointment rollups")
+    return wrapper
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # MongoDB returns naive UTC datetimes; aware query parameters are converted to match
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def day_of(date: datetime) -> datetime:
+    return date.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def rollup_keys(appointment: dict, specialization: Optional[str]) -> List[tuple]:
+    return [
+        ("total", "all"),
+        ("doctor", appointment.get("DoctorId") or UNKNOWN),
+        ("specialization", specialization or UNKNOWN),
+    ]
+
+
+def rollup_update(dimension: str, key: str, day: datetime, inc: dict) -> UpdateOne:
+    return UpdateOne(
+        {"_id": f"{dimension}:{key}:{day:%Y-%m-%d}"},
+        {"$inc": inc, "$setOnInsert": {"dimension": dimension, "key": key, "day": day}},
+        upsert=True,
+    )
+
+
+async def get_specialization(db, doctor_id: Optional[str]) -> Optional[str]:
+    if not doctor_id:
+        return None
+    doctor = await db.doctors.find_one({"DoctorId": doctor_id}, {"specialization": 1})
+    return doctor.get("specialization") if doctor else None
+
+
+@best_effort
+async def record_appointment(db, appointment: dict, delta: int, specialization: Optional[str] = None):
+    """
+    Count an appointment in (delta=1) or out of (delta=-1) its day's rollups.
+    Pass specialization when the doctor is already at hand to skip the lookup.
+    """
+    if not isinstance(appointment.get("date"), datetime):
+        return
+    if specialization is None:
+        specialization = await get_specialization(db, appointment.get("DoctorId"))
+    day = day_of(appointment["date"])
+    inc = {"count": delta, f"statuses.{appointment.get('status') or UNKNOWN}": delta}
+    await db[ROLLUP_COLLECTION].bulk_write(
+        [rollup_update(dimension, key, day, inc) for dimension, key in rollup_keys(appointment, specialization)],
+        ordered=False,
+    )
+
+
+@best_effort
+async def record_appointment_change(db, before: dict, after: dict):
+    """
+    Move an updated appointment between rollups. Nothing is written unless
+    the date, doctor or status changed.
+    """
+    if before.get("DoctorId") != after.get("DoctorId") or before.get("date") != after.get("date"):
+        await record_appointment(db, before, -1)
+        await record_appointment(db, after, 1)
+    elif before.get("status") != after.get("status"):
+        await record_status_changes(db, [(after, before.get("status"))])
+
+
+@best_effort
+async def record_status_changes(db, changes: List[tuple]):
+    """
+    Apply status transitions to the rollups; changes holds (appointment after
+    the change, previous status) pairs. All rollup writes go in one bulk_write.
+    """
+    changes = [(appointment, old) for appointment, old in changes if isinstance(appointment.get("date"), datetime)]
+    if not changes:
+        return
+    doctor_ids = list({appointment.get("DoctorId") for appointment, _ in changes})
+    doctors = await db.doctors.find({"DoctorId": {"$in": doctor_ids}}, {"DoctorId": 1, "specialization": 1}).to_list(None)
+    specializations = {doctor["DoctorId"]: doctor.get("specialization") for doctor in doctors}
+
+    operations = []
+    for appointment, old_status in changes:
+        inc = {
+            f"statuses.{old_status or UNKNOWN}": -1,
+            f"statuses.{appointment.get('status') or UNKNOWN}": 1,
+        }
+        day = day_of(appointment["date"])
+        specialization = specializations.get(appointment.get("DoctorId"))
+        for dimension, key in rollup_keys(appointment, specialization):
+            operations.append(rollup_update(dimension, key, day, inc))
+    await db[ROLLUP_COLLECTION].bulk_write(operations, ordered=False)
+
+
+@best_effort
+async def record_appointments_deleted(db, appointments: List[dict], specializations: Optional[Dict[str, str]] = None):
+    """
+    Count many deleted appointments out of the rollups with one bulk_write,
+    for cascading deletes and orphan cleanup. Pass specializations
+    (DoctorId -> specialization) when the doctors are already deleted.
+    """
+    appointments = [appointment for appointment in appointments if isinstance(appointment.get("date"), datetime)]
+    if not appointments:
+        return
+    if specializations is None:
+        doctor_ids = list({appointment.get("DoctorId") for appointment in appointments})
+        doctors = await db.doctors.find({"DoctorId": {"$in": doctor_ids}}, {"DoctorId": 1, "specialization": 1}).to_list(None)
+        specializations = {doctor["DoctorId"]: doctor.get("specialization") for doctor in doctors}
+
+    # Sum the decrements per rollup document first
+    incs: Dict[tuple, Dict[str, int]] = {}
+    for appointment in appointments:
+        day = day_of(appointment["date"])
+        for dimension, key in rollup_keys(appointment, specializations.get(appointment.get("DoctorId"))):
+            inc = incs.setdefault((dimension, key, day), {})
+            for field in ("count", f"statuses.{appointment.get('status') or UNKNOWN}"):
+                inc[field] = inc.get(field, 0) - 1
+    await db[ROLLUP_COLLECTION].bulk_write(
+        [rollup_update(dimension, key, day, inc) for (dimension, key, day), inc in incs.items()],
+        ordered=False,
+    )
+
+
+async def rebuild_rollups(db, start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+    """
+    Recompute the rollups for [start, end) from the appointments collection,
+    or for all days when no range is given. Returns the number of rollup documents written.
+    """
+    start, end = naive_utc(start), naive_utc(end)
+    match = {"date": {"$type": "date"}}
+    if start or end:
+        match["date"] = {}
+        if start:
+            match["date"]["$gte"] = day_of(start)
+        if end:
+            match["date"]["$lt"] = day_of(end)
+
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}},
+                "doctor": "$DoctorId",
+                "status": "$status",
+            },
+            "count": {"$sum": 1},
+        }},
+    ]
+    groups = await db.appointments.aggregate(pipeline, allowDiskUse=True).to_list(None)
+
+    doctors = await db.doctors.find({}, {"DoctorId": 1, "specialization": 1}).to_list(None)
+    specializations = {doctor["DoctorId"]: doctor.get("specialization") for doctor in doctors}
+
+    rollups: Dict[str, dict] = {}
+    for group in groups:
+        day = datetime.strptime(group["_id"]["day"], "%Y-%m-%d")
+        appointment = {"DoctorId": group["_id"].get("doctor")}
+        status_name = group["_id"].get("status") or UNKNOWN
+        for dimension, key in rollup_keys(appointment, specializations.get(appointment["DoctorId"])):
+            doc_id = f"{dimension}:{key}:{day:%Y-%m-%d}"
+            rollup = rollups.setdefault(
+                doc_id, {"_id": doc_id, "dimension": dimension, "key": key, "day": day, "count": 0, "statuses": {}}
+            )
+            rollup["count"] += group["count"]
+            rollup["statuses"][status_name] = rollup["statuses"].get(status_name, 0) + group["count"]
+
+    # Replaced in place, so readers never see the range empty and concurrent
+    # upserts cannot collide with the rebuilt documents
+    documents = list(rollups.values())
+    for i in range(0, len(documents), 1000):
+        await db[ROLLUP_COLLECTION].bulk_write(
+            [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in documents[i:i + 1000]],
+            ordered=False,
+        )
+    # Then drop the rollups of days, doctors or statuses that no longer have appointments
+    range_filter = {"day": match["date"]} if start or end else {}
+    existing = await db[ROLLUP_COLLECTION].find(range_filter, {"_id": 1}).to_list(None)
+    stale = [doc["_id"] for doc in existing if doc["_id"] not in rollups]
+    for i in range(0, len(stale), 1000):
+        await db[ROLLUP_COLLECTION].delete_many({"_id": {"$in": stale[i:i + 1000]}})
+    return len(documents)
+
+
+@job_handler("analytics.rebuild", singleton=True)
+async def rebuild_job(db, payload: dict) -> dict:
+    start = datetime.fromisoformat(payload["start"]) if payload.get("start") else None
+    end = datetime.fromisoformat(payload["end"]) if payload.get("end") else None
+    return {"documents": await rebuild_rollups(db, start, end)}
+
+
+def date_range(start: Optional[datetime], end: Optional[datetime]) -> tuple:
+    # Inclusive day range, defaulting to the last DEFAULT_RANGE_DAYS days
+    start, end = naive_utc(start), naive_utc(end)
+    end = day_of(end or datetime.now())
+    start = day_of(start) if start else end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_RANGE_DAYS} days")
+    return start, end + timedelta(days=1)
+
+
+async def read_rollups(db, dimension: str, start: datetime, end: datetime, key: Optional[str] = None) -> list:
+    query = {"dimension": dimension, "day": {"$gte": start, "$lt": end}}
+    if key is not None:
+        query["key"] = key
+    return await db[ROLLUP_COLLECTION].find(query, {"_id": 0, "dimension": 0}).sort("day", 1).to_list(None)
+
+
+def summarize(rollups: list) -> dict:
+    statuses: Dict[str, int] = {}
+    count = 0
+    for rollup in rollups:
+        count += rollup.get("count", 0)
+        for name, value in rollup.get("statuses", {}).items():
+            statuses[name] = statuses.get(name, 0) + value
+    # Incremental updates leave zero counters behind; drop them
+    statuses = {name: value for name, value in statuses.items() if value}
+    return {
+        "count": count,
+        "statuses": statuses,
+        "cancellation_rate": round(statuses.get("cancelled", 0) / count, 4) if count else 0.0,
+    }
+
+
+# Analytics endpoints
+@analytics_router.get("/appointments/trend")
+async def get_appointment_trend(start: Optional[datetime] = None, end: Optional[datetime] = None, db=Depends(get_db)):
+    start, end = date_range(start, end)
+    rollups = await read_rollups(db, "total", start, end)
+    return {
+        "start": start,
+        "end": end - timedelta(days=1),
+        "days": [{"day": r["day"], "count": r.get("count", 0), "statuses": r.get("statuses", {})} for r in rollups],
+        "summary": summarize(rollups),
+    }
+
+
+@analytics_router.get("/appointments/status")
+async def get_status_breakdown(start: Optional[datetime] = None, end: Optional[datetime] = None, db=Depends(get_db)):
+    start, end = date_range(start, end)
+    return summarize(await read_rollups(db, "total", start, end))
+
+
+@analytics_router.get("/doctors/workload")
+async def get_doctor_workload(start: Optional[datetime] = None, end: Optional[datetime] = None, db=Depends(get_db)):
+    start, end = date_range(start, end)
+    by_doctor: Dict[str, list] = {}
+    for rollup in await read_rollups(db, "doctor", start, end):
+        by_doctor.setdefault(rollup["key"], []).append(rollup)
+    return [
+        {"DoctorId": doctor_id, **summarize(rollups)}
+        for doctor_id, rollups in sorted(by_doctor.items())
+    ]
+
+
+@analytics_router.get("/doctors/{doctor_id}/workload")
+async def get_doctor_daily_workload(doctor_id: str, start: Optional[datetime] = None,
+                                    end: Optional[datetime] = None, db=Depends(get_db)):
+    start, end = date_range(start, end)
+    rollups = await read_rollups(db, "doctor", start, end, key=doctor_id)
+    return {
+        "DoctorId": doctor_id,
+        "days": [{"day": r["day"], "count": r.get("count", 0), "statuses": r.get("statuses", {})} for r in rollups],
+        "summary": summarize(rollups),
+    }
+
+
+@analytics_router.get("/specializations")
+async def get_specialization_load(start: Optional[datetime] = None, end: Optional[datetime] = None, db=Depends(get_db)):
+    start, end = date_range(start, end)
+    by_specialization: Dict[str, list] = {}
+    for rollup in await read_rollups(db, "specialization", start, end):
+        by_specialization.setdefault(rollup["key"], []).append(rollup)
+    return [
+        {"specialization": name, **summarize(rollups)}
+        for name, rollups in sorted(by_specialization.items())
+    ]
+
+
+@analytics_router.post("/rebuild", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+async def start_rebuild(start: Optional[datetime] = None, end: Optional[datetime] = None, db=Depends(get_db)):
+    # Runs on the job runner; poll GET /jobs/{id} for the outcome
+    if await job_pending(db, "analytics.rebuild"):
+        raise HTTPException(status_code=409, detail="A rebuild is already queued or running")
+    payload = {
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+    }
+    job = await submit_job(db, "analytics.rebuild", payload, priority=-1)
+    return job_out(job)
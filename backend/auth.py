@@ -7,7 +7,7 @@ from starlette import status
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from starlette.concurrency import run_in_threadpool
 import os 
 
 load_dotenv()
@@ -23,10 +23,8 @@ ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = 30  # You can adjust this value as needed
 
 # MongoDB connection
-MONGO_URI = os.getenv("mongo_uri")
-client = MongoClient(MONGO_URI)
-db = client["staff-management"]  # Replace with your database name
-users_collection = db["staff"]  # Replace with your users collection name
+# Set by the app lifespan to the "staff" collection of the shared Motor client
+users_collection = None
 
 #password hashing and unhashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated = "auto")
@@ -59,36 +57,37 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_user_by_username(username: str):
-    return users_collection.find_one({"username": username})
+async def get_user_by_username(username: str):
+    return await users_collection.find_one({"username": username})
 
 
 # Routes
 @route.post("/register", status_code=status.HTTP_201_CREATED)
 async def register_user(user: UserRegistration):
     # Check if the user already exists
-    if get_user_by_username(user.username):
+    if await get_user_by_username(user.username):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already exists")
 
     # Hash the password and save the user to the database
     if(user.confirm_password!=user.password):
         raise HTTPException(status_code = status.HTTP_400_BAD_REQUEST,detail="Passwords do not match")
-    hashed_password = hash_password(user.password)
+    # bcrypt is CPU bound, keep it off the event loop
+    hashed_password = await run_in_threadpool(hash_password, user.password)
     user_data = {
         "username": user.username,
         "email": user.email,
         "password": hashed_password,
         "created_at": datetime.utcnow()
     }
-    users_collection.insert_one(user_data)
+    await users_collection.insert_one(user_data)
     return {"message": "User registered successfully"}
 
 
 @route.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
     # Authenticate the user
-    user = get_user_by_username(form_data.username)
-    if not user or not verify_password(form_data.password, user["password"]):
+    user = await get_user_by_username(form_data.username)
+    if not user or not await run_in_threadpool(verify_password, form_data.password, user["password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password",
@@ -107,7 +106,7 @@ async def get_current_user(token: Annotated[str, Depends(ouath2_Bearer)]):
         username: str = payload.get("sub")
         if username is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        user = get_user_by_username(username)
+        user = await get_user_by_username(username)
         if user is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
         return {"username": user["username"], "email": user["email"]}
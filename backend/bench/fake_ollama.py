@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+# Stand-in for the Ollama HTTP API with configurable latency.
+# Implements the endpoints the backend calls: /api/chat, /api/generate and /api/tags.
+
+FILLER = (
+    "Please consult a healthcare professional for advice specific to your situation. "
+    "General guidance includes staying hydrated, getting enough rest and monitoring symptoms. "
+).split()
+
+
+def create_app(first_token_ms: float = 300, token_ms: float = 20, tokens: int = 60,
+               model: str = "gemma3:1b") -> Starlette:
+    """
+    first_token_ms is the delay before the first chunk (prompt processing),
+    token_ms the delay between subsequent chunks
+    """
+
+    def chunk(content: str, done: bool, started: float, count: int) -> bytes:
+        body = {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+        }
+        if done:
+            elapsed_ns = int((time.perf_counter() - started) * 1_000_000_000)
+            body.update({
+                "done_reason": "stop",
+                "total_duration": elapsed_ns,
+                "load_duration": 0,
+                "prompt_eval_count": 32,
+                "prompt_eval_duration": int(first_token_ms * 1_000_000),
+                "eval_count": count,
+                "eval_duration": max(1, elapsed_ns - int(first_token_ms * 1_000_000)),
+            })
+        return (json.dumps(body) + "\n").encode()
+
+    async def stream_tokens():
+        started = time.perf_counter()
+        await asyncio.sleep(first_token_ms / 1000)
+        for i in range(tokens):
+            if i:
+                await asyncio.sleep(token_ms / 1000)
+            yield chunk(FILLER[i % len(FILLER)] + " ", False, started, i + 1)
+        yield chunk("", True, started, tokens)
+
+    async def chat(request: Request):
+        payload = await request.json()
+        if payload.get("stream", True):
+            return StreamingResponse(stream_tokens(), media_type="application/x-ndjson")
+        parts = []
+        last = b""
+        async for line in stream_tokens():
+            last = line
+            parts.append(json.loads(line)["message"]["content"])
+        body = json.loads(last)
+        body["message"]["content"] = "".join(parts)
+        return JSONResponse(body)
+
+    async def generate(request: Request):
+        # Only used for model preloading, so answer immediately
+        return JSONResponse({
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "response": "",
+            "done": True,
+            "done_reason": "load",
+        })
+
+    async def tags(request: Request):
+        return JSONResponse({"models": [{"name": model, "model": model}]})
+
+    return Starlette(routes=[
+        Route("/api/chat", chat, methods=["POST"]),
+        Route("/api/generate", generate, methods=["POST"]),
+        Route("/api/tags", tags, methods=["GET"]),
+    ])
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Ollama server with configurable latency")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--tokens", type=int, default=60)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(args.first_token_ms, args.token_ms, args.tokens),
+        host="127.0.0.1", port=args.port, log_level="warning",
+    )
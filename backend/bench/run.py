@@ -0,0 +1,301 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+import httpx
+import ollama
+import uvicorn
+
+import main
+import auth
+import AI
+import database
+from bench import synthetic
+from bench.fake_ollama import create_app as create_fake_ollama
+
+# Reproducible API benchmark: seeds synthetic data, drives the FastAPI app
+# in-process (ASGI transport) or over uvicorn, and reports per-endpoint
+# throughput and latency percentiles as JSON.
+#
+#   cd backend
+#   python -m bench.run --patients 10000 --output results.json
+#   python -m bench.run --patients 10000 --compare results.json
+
+BENCH_USER = "bench-user"
+BENCH_PASSWORD = "bench-password"
+
+
+def _record_payload(rng: random.Random, doctors: int) -> dict:
+    record = synthetic.make_medical_record(rng, datetime.now(), doctors)
+    record["date"] = record["date"].isoformat()
+    # Attending doctor ids are business keys, which add-record does not look up
+    return record
+
+
+def build_endpoints(dataset: dict, rng: random.Random) -> dict:
+    """
+    Map endpoint names to functions returning (method, url, request kwargs)
+    for the next request
+    """
+    patients = dataset["patients"]
+    doctors = dataset["doctors"]
+    history_keys = dataset["history_keys"]
+
+    endpoints = {
+        "list_patients": lambda: ("GET", "/patients/", {}),
+        # The columns PatientList.jsx renders, as JSON rows and as columnar MessagePack
+        "list_patients_fields": lambda: ("GET", "/patients/", {"params": {"fields": "_id,PatientId,name,age"}}),
+        "list_patients_msgpack": lambda: (
+            "GET", "/patients/",
+            {"params": {"fields": "_id,PatientId,name,age", "format": "columns"},
+             "headers": {"Accept": "application/msgpack"}},
+        ),
+        "list_doctors": lambda: ("GET", "/doctors/", {}),
+        "list_appointments": lambda: ("GET", "/appointments/", {}),
+        "get_patient": lambda: ("GET", f"/patients/{synthetic.patient_id(rng.randrange(patients))}", {}),
+        "search_patients": lambda: (
+            "GET", "/search/patients", {"params": {"query": rng.choice(synthetic.FIRST_NAMES)}}
+        ),
+        "dashboard_stats": lambda: ("GET", "/dashboard/stats", {}),
+        "login": lambda: (
+            "POST", "/auth/token", {"data": {"username": BENCH_USER, "password": BENCH_PASSWORD}}
+        ),
+        "ai_query": lambda: (
+            "POST", "/ai/query", {"json": {"query": "What are common symptoms of dehydration?"}}
+        ),
+    }
+    if history_keys:
+        endpoints["add_record"] = lambda: (
+            "PUT",
+            f"/patient-history/{rng.choice(history_keys)}/add-record",
+            {"json": _record_payload(rng, doctors)},
+        )
+    return endpoints
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+async def run_endpoint(client: httpx.AsyncClient, next_request, total: int, concurrency: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        method, url, kwargs = next_request()
+        await client.request(method, url, **kwargs)
+
+    latencies = []
+    errors = 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            method, url, kwargs = next_request()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    to_ms = 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * to_ms, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * to_ms, 3),
+        "p95_ms": round(percentile(latencies, 95) * to_ms, 3),
+        "p99_ms": round(percentile(latencies, 99) * to_ms, 3),
+        "max_ms": round(latencies[-1] * to_ms, 3) if latencies else 0.0,
+    }
+
+
+async def start_server(app, port: int) -> tuple:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+    return server, task
+
+
+async def stop_server(server, task):
+    server.should_exit = True
+    await task
+
+
+async def connect_databases(args):
+    """
+    Point the app's module-level database handles at the benchmark databases.
+    The app lifespan keeps handles that are already set.
+    """
+    if args.mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        motor_client = AsyncIOMotorClient(args.mongo_uri)
+        await motor_client.drop_database(args.db_name)
+        await motor_client.drop_database(args.db_name + "-staff")
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+
+        motor_client = AsyncMongoMockClient()
+
+    main.client = motor_client
+    main.db = motor_client[args.db_name]
+    main.app.state.mongo_client = motor_client
+    main.app.state.db = main.db
+    auth.users_collection = motor_client[args.db_name + "-staff"]["staff"]
+    auth.SECRET_KEY = auth.SECRET_KEY or "bench-secret"
+    auth.ALGORITHM = auth.ALGORITHM or "HS256"
+    await auth.users_collection.insert_one({
+        "username": BENCH_USER,
+        "email": "bench@hospital.example",
+        "password": auth.hash_password(BENCH_PASSWORD),
+        "created_at": datetime.utcnow(),
+    })
+    return main.db
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict) -> str:
+    lines = [f"{'endpoint':<20}{'rps':>12}{'Δrps':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'Δp99':>9}"]
+    for name, result in current["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(name)
+
+        def delta(key):
+            if not base or not base.get(key):
+                return "n/a"
+            return f"{(result[key] - base[key]) / base[key] * 100:+.1f}%"
+
+        lines.append(
+            f"{name:<20}{result['rps']:>12.1f}{delta('rps'):>9}{result['p50_ms']:>10.2f}"
+            f"{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}{delta('p99_ms'):>9}"
+        )
+    return "\n".join(lines)
+
+
+async def run(args) -> dict:
+    db = await connect_databases(args)
+
+    print(f"Seeding {args.patients} patients...", file=sys.stderr)
+    seed_started = time.perf_counter()
+    dataset = await synthetic.seed(db, args.patients, args.history_patients, args.history_length, args.seed)
+    seed_seconds = time.perf_counter() - seed_started
+
+    servers = []
+    try:
+        if args.ollama_url:
+            AI.ollama_client = ollama.AsyncClient(host=args.ollama_url)
+        else:
+            fake = create_fake_ollama(args.first_token_ms, args.token_ms, args.tokens)
+            servers.append(await start_server(fake, args.ollama_port))
+            AI.ollama_client = ollama.AsyncClient(host=f"http://127.0.0.1:{args.ollama_port}")
+
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        if args.mode == "uvicorn":
+            servers.append(await start_server(main.app, args.port))
+            client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=120)
+        else:
+            # ASGITransport does not run the lifespan; build the indexes it would, so
+            # in-process numbers stay comparable with uvicorn mode
+            await database.ensure_indexes(db)
+            await auth.users_collection.create_index("username")
+            client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=main.app), base_url="http://bench", timeout=120
+            )
+
+        rng = random.Random(args.seed)
+        endpoints = build_endpoints(dataset, rng)
+        selected = args.endpoints.split(",") if args.endpoints else list(endpoints)
+
+        results = {}
+        async with client:
+            for name in selected:
+                if name not in endpoints:
+                    raise SystemExit(f"Unknown endpoint {name!r}, choose from {', '.join(endpoints)}")
+                total = args.ai_requests if name == "ai_query" else args.requests
+                print(f"Running {name} ({total} requests)...", file=sys.stderr)
+                results[name] = await run_endpoint(client, endpoints[name], total, args.concurrency, args.warmup)
+    finally:
+        for server, task in reversed(servers):
+            await stop_server(server, task)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "mode": args.mode,
+            "mongo": "mongod" if args.mongo_uri else "mongomock",
+            "ollama": args.ollama_url or f"fake(first_token_ms={args.first_token_ms}, token_ms={args.token_ms}, tokens={args.tokens})",
+            "concurrency": args.concurrency,
+            "seed_seconds": round(seed_seconds, 2),
+            "dataset": {k: v for k, v in dataset.items() if k != "history_keys"},
+        },
+        "endpoints": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Hospital Management API benchmark")
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--port", type=int, default=8765, help="API port in uvicorn mode")
+    parser.add_argument("--mongo-uri", default=os.getenv("BENCH_MONGO_URI"),
+                        help="Local mongod to benchmark against; mongomock-motor is used when omitted")
+    parser.add_argument("--db-name", default="hospital_management_bench")
+    parser.add_argument("--patients", type=int, default=10_000,
+                        help="Patients to seed; doctors and appointments scale with it")
+    parser.add_argument("--history-patients", type=int, default=1000)
+    parser.add_argument("--history-length", type=int, default=100, help="Medical records per history")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint")
+    parser.add_argument("--ai-requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--endpoints", help="Comma separated subset of endpoints to run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--ollama-url", help="Real Ollama server; the fake one is started when omitted")
+    parser.add_argument("--ollama-port", type=int, default=11435)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(report, json.load(f)), file=sys.stderr)
@@ -0,0 +1,176 @@
+import random
+from datetime import datetime, timedelta
+
+# Synthetic hospital data shaped like the documents the API writes
+
+FIRST_NAMES = [
+    "Aarav", "Priya", "Rohan", "Ananya", "Vikram", "Sneha", "Arjun", "Meera", "Kabir", "Isha",
+    "John", "Maria", "David", "Sara", "Michael", "Laura", "James", "Emma", "Daniel", "Olivia",
+]
+LAST_NAMES = [
+    "Sharma", "Patel", "Iyer", "Reddy", "Gupta", "Nair", "Singh", "Das", "Menon", "Kapoor",
+    "Smith", "Garcia", "Brown", "Wilson", "Taylor", "Clark", "Lewis", "Walker", "Young", "King",
+]
+CITIES = ["Mumbai", "Delhi", "Bengaluru", "Chennai", "Pune", "Hyderabad", "Kolkata", "Jaipur"]
+STREETS = ["MG Road", "Park Street", "Station Road", "Lake View", "Hill Road", "Temple Street"]
+SPECIALIZATIONS = [
+    "Cardiology", "Neurology", "Orthopedics", "Pediatrics", "Dermatology",
+    "Oncology", "General Medicine", "ENT", "Gynecology", "Psychiatry",
+]
+BLOOD_TYPES = ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"]
+CONDITIONS = [
+    "Hypertension", "Type 2 diabetes", "Asthma", "Migraine", "Hypothyroidism",
+    "Osteoarthritis", "Seasonal allergies", "Anemia", "GERD", "Chronic back pain",
+]
+TREATMENTS = [
+    "Lifestyle changes and follow-up in 4 weeks", "Physiotherapy twice a week",
+    "Started on oral medication", "Dosage adjusted", "Referred to specialist",
+    "Blood work ordered", "Rest and hydration", "Continue current plan",
+]
+MEDICATIONS = [
+    "Metformin 500mg", "Amlodipine 5mg", "Salbutamol inhaler", "Levothyroxine 50mcg",
+    "Paracetamol 650mg", "Pantoprazole 40mg", "Atorvastatin 10mg", "Cetirizine 10mg",
+]
+STATUSES = ["scheduled", "completed", "cancelled"]
+STATUS_WEIGHTS = [0.3, 0.55, 0.15]
+
+
+def patient_id(n: int) -> str:
+    return f"P{n:07d}"
+
+
+def doctor_id(n: int) -> str:
+    return f"D{n:05d}"
+
+
+def appointment_id(n: int) -> str:
+    return f"A{n:08d}"
+
+
+def _name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def _contact(rng: random.Random) -> str:
+    return f"9{rng.randrange(100000000, 999999999)}"
+
+
+def make_patient(rng: random.Random, n: int, now: datetime) -> dict:
+    conditions = rng.sample(CONDITIONS, rng.randint(0, 3))
+    return {
+        "PatientId": patient_id(n),
+        "name": _name(rng),
+        "age": rng.randint(1, 95),
+        "gender": rng.choice(["male", "female", "other"]),
+        "contact": _contact(rng),
+        "address": f"{rng.randint(1, 400)} {rng.choice(STREETS)}, {rng.choice(CITIES)}",
+        "blood_type": rng.choice(BLOOD_TYPES),
+        "medical_history": ", ".join(conditions) or None,
+        "admission_date": now - timedelta(days=rng.randint(0, 3650), minutes=rng.randint(0, 1440)),
+    }
+
+
+def make_doctor(rng: random.Random, n: int) -> dict:
+    name = _name(rng)
+    return {
+        "DoctorId": doctor_id(n),
+        "name": f"Dr. {name}",
+        "specialization": rng.choice(SPECIALIZATIONS),
+        "contact": _contact(rng),
+        "email": f"{name.lower().replace(' ', '.')}.{n}@hospital.example",
+        "schedule": {"mon-fri": "09:00-17:00"},
+    }
+
+
+def make_appointment(rng: random.Random, n: int, patients: int, doctors: int, now: datetime) -> dict:
+    return {
+        "AppointmentId": appointment_id(n),
+        "PatientId": patient_id(rng.randrange(patients)),
+        "DoctorId": doctor_id(rng.randrange(doctors)),
+        "date": now + timedelta(days=rng.randint(-365, 60), hours=rng.randint(8, 18)),
+        "status": rng.choices(STATUSES, STATUS_WEIGHTS)[0],
+        "notes": rng.choice([None, "Follow-up visit", "First consultation", "Review lab reports"]),
+    }
+
+
+def make_medical_record(rng: random.Random, date: datetime, doctors: int) -> dict:
+    return {
+        "date": date,
+        "diagnosis": rng.choice(CONDITIONS),
+        "treatment": rng.choice(TREATMENTS),
+        "medication": rng.sample(MEDICATIONS, rng.randint(0, 3)),
+        "notes": "Patient reports " + rng.choice(["improvement", "no change", "mild discomfort", "fatigue"]),
+        "vital_signs": {
+            "temperature": round(rng.uniform(36.1, 38.9), 1),
+            "blood_pressure": f"{rng.randint(100, 160)}/{rng.randint(60, 100)}",
+            "heart_rate": rng.randint(55, 120),
+            "respiratory_rate": rng.randint(12, 24),
+            "oxygen_saturation": round(rng.uniform(92, 100), 1),
+            "glucose_level": round(rng.uniform(70, 220), 1),
+        },
+        "attending_doctor_id": doctor_id(rng.randrange(doctors)),
+    }
+
+
+def make_history(rng: random.Random, patient_key: str, records: int, doctors: int, now: datetime) -> dict:
+    start = now - timedelta(days=records * 14)
+    return {
+        "patient_id": patient_key,
+        "medical_records": [
+            make_medical_record(rng, start + timedelta(days=i * 14), doctors)
+            for i in range(records)
+        ],
+    }
+
+
+async def _insert_batched(collection, docs, batch_size: int):
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+
+
+async def seed(db, patients: int, history_patients: int, history_length: int,
+               seed_value: int = 42, batch_size: int = 5000) -> dict:
+    """
+    Fill db with patients, doctors (1 per 100 patients), appointments (3 per patient)
+    and long medical histories for the first history_patients patients.
+    Returns the generated sizes plus a few keys the load generator targets.
+    """
+    rng = random.Random(seed_value)
+    now = datetime.now()
+    doctors = max(10, patients // 100)
+    appointments = patients * 3
+
+    await _insert_batched(db.patients, (make_patient(rng, n, now) for n in range(patients)), batch_size)
+    await _insert_batched(db.doctors, (make_doctor(rng, n) for n in range(doctors)), batch_size)
+    await _insert_batched(
+        db.appointments,
+        (make_appointment(rng, n, patients, doctors, now) for n in range(appointments)),
+        batch_size,
+    )
+
+    # Histories are keyed by the patient document's ObjectId, as the history endpoints expect
+    history_patients = min(history_patients, patients)
+    history_keys = []
+    cursor = db.patients.find({}, {"_id": 1}).sort("PatientId", 1).limit(history_patients)
+    async for patient in cursor:
+        history_keys.append(str(patient["_id"]))
+    await _insert_batched(
+        db.patient_history,
+        (make_history(rng, key, history_length, doctors, now) for key in history_keys),
+        max(1, batch_size // max(1, history_length)),
+    )
+
+    return {
+        "patients": patients,
+        "doctors": doctors,
+        "appointments": appointments,
+        "history_patients": history_patients,
+        "history_length": history_length,
+        "history_keys": history_keys,
+    }
@@ -0,0 +1,66 @@
+import os
+from fastapi import Request
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING
+from pymongo.server_api import ServerApi
+from metrics import MongoCommandListener
+
+DB_NAME = "hospital_management"
+STAFF_DB_NAME = "staff-management"
+
+# Connection pool size per worker process; total connections = workers * MONGO_MAX_POOL_SIZE
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+
+# Indexes the API queries rely on, checked (and created if missing) at startup
+INDEXES = {
+    "patients": [
+        [("PatientId", ASCENDING)],
+        [("admission_date", DESCENDING)],
+    ],
+    "doctors": [
+        [("DoctorId", ASCENDING)],
+    ],
+    "appointments": [
+        [("AppointmentId", ASCENDING)],
+        [("date", ASCENDING)],
+        # Patient and doctor timelines; _id is the cursor's tie-breaker
+        [("PatientId", ASCENDING), ("date", ASCENDING), ("_id", ASCENDING)],
+        [("DoctorId", ASCENDING), ("date", ASCENDING), ("_id", ASCENDING)],
+    ],
+    "patient_details": [
+        [("patient_id", ASCENDING)],
+    ],
+    "patient_history": [
+        [("patient_id", ASCENDING)],
+        [("updated_at", ASCENDING)],
+    ],
+    "analytics_daily": [
+        [("dimension", ASCENDING), ("day", ASCENDING), ("key", ASCENDING)],
+    ],
+}
+
+
+def create_client(uri: str | None = None) -> AsyncIOMotorClient:
+    """
+    One Motor client (and connection pool) per worker process, shared by every router
+    """
+    return AsyncIOMotorClient(
+        uri or os.getenv("mongo_uri"),
+        server_api=ServerApi('1'),
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        event_listeners=[MongoCommandListener()],
+    )
+
+
+async def ensure_indexes(db):
+    for collection, indexes in INDEXES.items():
+        for keys in indexes:
+            # No-op when the index already exists
+            await db[collection].create_index(keys)
+
+
+def get_db(request: Request):
+    # Dependency for routers outside main.py; the lifespan stores the database on app.state
+    return request.app.state.db
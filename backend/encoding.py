@@ -0,0 +1,196 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Literal, Optional, Type
+import msgpack
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, Query, Request, Response
+from pydantic import BaseModel
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+# Response header carrying the cursor of the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# rows: a list of objects (the default); columns: {"count": n, "columns": {field: [values]}}
+ListFormat = Literal["rows", "columns"]
+
+# OpenAPI description of the extra encodings, for the list endpoints' responses=
+LIST_RESPONSES = {200: {"content": {MSGPACK_MEDIA_TYPE: {}}}}
+
+
+def encode_default(value: Any) -> Any:
+    # Dates are sent as ISO strings, as in the default JSON responses
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(document: dict, order_by: Optional[str]) -> str:
+    if order_by is None:
+        return str(document["_id"])
+    # Opaque to clients: the last document's order_by value and _id
+    raw = f"{document[order_by].isoformat()}|{document['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by: Optional[str]) -> tuple:
+    try:
+        if order_by is None:
+            return None, ObjectId(cursor)
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        value, _id = raw.split("|")
+        return datetime.fromisoformat(value), ObjectId(_id)
+    except (InvalidId, ValueError, TypeError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def accept_quality(accept: str) -> Dict[str, float]:
+    # Media ranges of an Accept header and their q values
+    qualities = {}
+    for media_range in accept.split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[media_type.lower()] = quality
+    return qualities
+
+
+def prefers_msgpack(accept: str) -> bool:
+    # MessagePack only when asked for explicitly and not ranked below JSON
+    qualities = accept_quality(accept)
+    msgpack_quality = max((qualities.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES), default=0.0)
+    json_quality = qualities.get("application/json", qualities.get("application/*", qualities.get("*/*", 0.0)))
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+
+def to_columns(documents: List[dict], fields: Optional[List[str]]) -> dict:
+    if fields is None:
+        # Every key seen, in order of first appearance
+        fields = list(dict.fromkeys(key for document in documents for key in document))
+    return {
+        "count": len(documents),
+        "columns": {field: [document.get(field) for document in documents] for field in fields},
+    }
+
+
+class ListOptions:
+    """
+    Dependency for list endpoints: fields= projection, format= and Accept negotiation,
+    and limit=/cursor= paging in _id order (or by a date field and _id, see find).
+    Without any of them the endpoint's response is unchanged.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        response: Response,
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. _id,name,age"),
+        format: ListFormat = "rows",
+        limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; the next page's cursor is in X-Next-Cursor"),
+        cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    ):
+        self.fields = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+        self.format = format
+        self.limit = limit
+        self.cursor = cursor
+        self.next_cursor: Optional[str] = None
+        self.msgpack = prefers_msgpack(request.headers.get("accept", ""))
+        self.response = response
+        # The body depends on Accept, so caches must key on it
+        response.headers["Vary"] = "Accept"
+
+    async def find(self, collection, query: dict, model: Type[BaseModel], default_limit: int = 1000,
+                   order_by: Optional[str] = None) -> List[dict]:
+        """
+        Run query with the requested projection and page, and stringify the ids.
+        With order_by (a date field) the documents are always returned in
+        (order_by, _id) order, paged by a cursor over both.
+        """
+        projection = self.projection(model)
+        if order_by is None and self.limit is None and self.cursor is None:
+            documents = await collection.find(query, projection).to_list(default_limit)
+        else:
+            # The cursor needs _id and order_by whatever the requested fields; they are dropped again below
+            hidden = []
+            if projection is not None:
+                if projection.pop("_id", None) == 0:
+                    hidden.append("_id")
+                if order_by is not None and order_by not in projection:
+                    projection[order_by] = 1
+                    hidden.append(order_by)
+            if self.cursor is not None:
+                value, last_id = decode_cursor(self.cursor, order_by)
+                if order_by is None:
+                    after = {"_id": {"$gt": last_id}}
+                else:
+                    after = {"$or": [{order_by: {"$gt": value}}, {order_by: value, "_id": {"$gt": last_id}}]}
+                query = {"$and": [query, after]}
+            sort = [(order_by, 1), ("_id", 1)] if order_by is not None else [("_id", 1)]
+            limit = self.limit or default_limit
+            # One extra document tells whether there is a next page
+            documents = await collection.find(query, projection).sort(sort).limit(limit + 1).to_list(None)
+            if len(documents) > limit:
+                documents = documents[:limit]
+                self.next_cursor = encode_cursor(documents[-1], order_by)
+                self.response.headers[NEXT_CURSOR_HEADER] = self.next_cursor
+            if hidden:
+                for document in documents:
+                    for field in hidden:
+                        document.pop(field, None)
+        for document in documents:
+            if "_id" in document:
+                document["_id"] = str(document["_id"])
+        return documents
+
+    def projection(self, model: Type[BaseModel]) -> Optional[Dict[str, int]]:
+        """
+        MongoDB projection for the requested fields, validated against model
+        """
+        allowed = [info.alias or name for name, info in model.model_fields.items()]
+        if not self.fields:
+            # The default response is filtered by response_model; the others by projecting its fields
+            return None if self.is_default() else {field: 1 for field in allowed}
+        unknown = [field for field in self.fields if field not in allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(sorted(allowed))}",
+            )
+        projection = {field: 1 for field in self.fields}
+        if "_id" not in projection:
+            projection["_id"] = 0
+        return projection
+
+    def is_default(self) -> bool:
+        return not self.fields and self.format == "rows" and not self.msgpack
+
+    def render(self, documents: List[dict]) -> Any:
+        if self.is_default():
+            # Default JSON, validated against the endpoint's response_model
+            return documents
+        content = to_columns(documents, self.fields) if self.format == "columns" else documents
+        headers = {"Vary": "Accept"}
+        if self.next_cursor:
+            headers[NEXT_CURSOR_HEADER] = self.next_cursor
+        if self.msgpack:
+            return Response(
+                msgpack.packb(content, default=encode_default),
+                media_type=MSGPACK_MEDIA_TYPE,
+                headers=headers,
+            )
+        # Projected documents lack required fields, so they bypass response_model
+        return Response(
+            json.dumps(content, default=encode_default, ensure_ascii=False, separators=(",", ":")),
+            media_type="application/json",
+            headers=headers,
+        )
@@ -0,0 +1,38 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Production server: gunicorn -c gunicorn.conf.py main:app
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# One async worker per core; each worker runs its own event loop and Motor pool
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# AI generations can take a while, so allow long requests
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+# On SIGTERM workers stop accepting connections and get this long to finish in-flight requests
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+# Recycle workers periodically, staggered so they do not restart together
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+
+# Workers share Prometheus samples through this directory
+if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="hospital-metrics-")
+
+
+def on_starting(server):
+    # Start with an empty metrics directory so stale worker files are not reported
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
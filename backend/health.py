@@ -0,0 +1,63 @@
+import asyncio
+import os
+import time
+from fastapi import APIRouter, Request, Response
+import AI
+
+health_router = APIRouter(tags=["health"])
+
+# Seconds each dependency check may take before it is reported as down
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+
+STARTED_AT = time.time()
+
+
+async def check_database(client) -> dict:
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(client.admin.command("ping"), HEALTH_CHECK_TIMEOUT)
+    except Exception as e:
+        return {"status": "down", "error": str(e) or type(e).__name__}
+    return {"status": "up", "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+
+async def check_llm() -> dict:
+    start = time.perf_counter()
+    try:
+        running = await asyncio.wait_for(AI.ollama_client.ps(), HEALTH_CHECK_TIMEOUT)
+    except Exception as e:
+        return {"status": "down", "error": str(e) or type(e).__name__}
+    loaded = any(model.model == AI.MODEL_NAME for model in running.models)
+    return {
+        "status": "up",
+        "model": AI.MODEL_NAME,
+        "model_loaded": loaded,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+# Liveness: the worker is running and serving requests
+@health_router.get("/health")
+async def liveness():
+    return {
+        "status": "ok",
+        "pid": os.getpid(),
+        "uptime_seconds": round(time.time() - STARTED_AT, 1),
+    }
+
+
+# Readiness: the worker can serve traffic. The database is required; the LLM
+# only degrades the AI endpoints, so it is reported but does not fail readiness.
+@health_router.get("/ready")
+async def readiness(request: Request, response: Response):
+    state = request.app.state
+    database, llm = await asyncio.gather(check_database(state.mongo_client), check_llm())
+    ready = database["status"] == "up"
+    if not ready:
+        response.status_code = 503
+    return {
+        "status": "ready" if ready else "unavailable",
+        "degraded": llm["status"] != "up",
+        "pid": os.getpid(),
+        "checks": {"database": database, "llm": llm},
+    }
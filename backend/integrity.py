@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import os
+from typing import Dict, List, Set
+from bson import ObjectId
+from fastapi import APIRouter, Depends, status
+import analytics
+import auth
+from AI import SUMMARY_COLLECTION
+from database import get_db
+from jobs import Job, job_handler, job_out, schedule_job, submit_job
+
+logger = logging.getLogger("integrity")
+
+integrity_router = APIRouter(
+    prefix="/admin/integrity",
+    tags=["integrity"],
+    dependencies=[Depends(auth.get_current_user)],
+)
+
+# Documents read or deleted per batch
+INTEGRITY_BATCH_SIZE = int(os.getenv("INTEGRITY_BATCH_SIZE", "500"))
+# Pause between orphan scan batches, so the scan never competes with live traffic
+INTEGRITY_BATCH_PAUSE_SECONDS = float(os.getenv("INTEGRITY_BATCH_PAUSE_SECONDS", "0.2"))
+# Orphans deleted per scan at most; the next scan continues
+INTEGRITY_MAX_DELETES = int(os.getenv("INTEGRITY_MAX_DELETES", "10000"))
+# Seconds between scheduled scans; 0 disables them
+INTEGRITY_SCAN_INTERVAL_SECONDS = float(os.getenv("INTEGRITY_SCAN_INTERVAL_SECONDS", "21600"))
+
+# (child collection, field, parent collection, parent field): every child document
+# must reference an existing parent. Histories, details and summaries are keyed by
+# the patient document id, appointments by the business ids.
+REFERENCES = [
+    ("appointments", "PatientId", "patients", "PatientId"),
+    ("appointments", "DoctorId", "doctors", "DoctorId"),
+    ("patient_details", "patient_id", "patients", "_id"),
+    ("patient_history", "patient_id", "patients", "_id"),
+    (SUMMARY_COLLECTION, "_id", "patients", "_id"),
+]
+
+# Appointment fields the rollups need when appointments are deleted
+APPOINTMENT_FIELDS = {"DoctorId": 1, "PatientId": 1, "date": 1, "status": 1}
+
+
+def supports_transactions(client) -> bool:
+    # Transactions need a replica set or sharded cluster (Atlas); a standalone development server has none
+    description = getattr(client, "topology_description", None)
+    return description is not None and description.topology_type_name in (
+        "ReplicaSetWithPrimary", "Sharded", "LoadBalanced",
+    )
+
+
+def child_filters(collection: str, parent: dict) -> List[tuple]:
+    filters = []
+    for child, field, parent_collection, parent_field in REFERENCES:
+        if parent_collection == collection:
+            value = parent.get(parent_field)
+            filters.append((child, {field: str(value) if parent_field == "_id" else value}))
+    return filters
+
+
+async def delete_with_children(db, collection: str, parent: dict, session=None) -> tuple:
+    counts: Dict[str, int] = {}
+    appointments: List[dict] = []
+    for child, query in child_filters(collection, parent):
+        counts[child] = counts.get(child, 0)
+        if child != "appointments":
+            result = await db[child].delete_many(query, session=session)
+            counts[child] += result.deleted_count
+            continue
+        # Appointments go in batches; their rollups are updated from what was deleted
+        while True:
+            batch = await db.appointments.find(query, APPOINTMENT_FIELDS, session=session).limit(INTEGRITY_BATCH_SIZE).to_list(None)
+            if not batch:
+                break
+            result = await db.appointments.delete_many({"_id": {"$in": [doc["_id"] for doc in batch]}}, session=session)
+            counts[child] += result.deleted_count
+            appointments.extend(batch)
+    result = await db[collection].delete_one({"_id": parent["_id"]}, session=session)
+    counts[collection] = result.deleted_count
+    return counts, appointments
+
+
+async def cascade_delete(db, collection: str, parent: dict) -> Dict[str, int]:
+    """
+    Delete parent from collection along with every document referencing it, and
+    return the number deleted per collection. Runs in one transaction where the
+    deployment supports it. Otherwise children go first, so a failed delete can be
+    retried, and anything created meanwhile is left to the orphan scan.
+    """
+    if supports_transactions(db.client):
+        async with await db.client.start_session() as session:
+            # with_transaction retries on transient errors, so side effects wait for the commit
+            counts, appointments = await session.with_transaction(
+                lambda session: delete_with_children(db, collection, parent, session)
+            )
+    else:
+        counts, appointments = await delete_with_children(db, collection, parent)
+
+    specializations = None
+    if collection == "doctors":
+        specializations = {parent.get("DoctorId"): parent.get("specialization")}
+    await analytics.record_appointments_deleted(db, appointments, specializations)
+    return counts
+
+
+async def existing_keys(db, parent: str, parent_field: str, keys: Set) -> Set:
+    if parent_field == "_id":
+        ids = [ObjectId(key) for key in keys if isinstance(key, str) and ObjectId.is_valid(key)]
+        parents = await db[parent].find({"_id": {"$in": ids}}, {"_id": 1}).to_list(None)
+        return {str(doc["_id"]) for doc in parents}
+    parents = await db[parent].find({parent_field: {"$in": list(keys)}}, {parent_field: 1}).to_list(None)
+    return {doc[parent_field] for doc in parents}
+
+
+async def scan_reference(db, child: str, field: str, parent: str, parent_field: str,
+                         dry_run: bool, budget: int) -> dict:
+    """
+    Walk child in _id order, one batch at a time, and delete (up to budget) the
+    documents whose parent no longer exists
+    """
+    found = 0
+    deleted = 0
+    last_id = None
+    complete = False
+    projection = APPOINTMENT_FIELDS if child == "appointments" else {field: 1}
+    while dry_run or deleted < budget:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = await db[child].find(query, projection).sort("_id", 1).limit(INTEGRITY_BATCH_SIZE).to_list(None)
+        if not batch:
+            complete = True
+            break
+        last_id = batch[-1]["_id"]
+
+        existing = await existing_keys(db, parent, parent_field, {doc.get(field) for doc in batch})
+        orphans = [doc for doc in batch if doc.get(field) not in existing]
+        found += len(orphans)
+        if orphans and not dry_run:
+            orphans = orphans[:budget - deleted]
+            result = await db[child].delete_many({"_id": {"$in": [doc["_id"] for doc in orphans]}})
+            deleted += result.deleted_count
+            if child == "appointments":
+                await analytics.record_appointments_deleted(db, orphans)
+        await asyncio.sleep(INTEGRITY_BATCH_PAUSE_SECONDS)
+    return {
+        "collection": child,
+        "field": field,
+        "parent": parent,
+        "orphans": found,
+        "deleted": deleted,
+        "complete": complete,
+    }
+
+
+@job_handler("integrity.scan", singleton=True)
+async def scan_job(db, payload: dict) -> dict:
+    dry_run = bool(payload.get("dry_run"))
+    budget = INTEGRITY_MAX_DELETES
+    references = []
+    for reference in REFERENCES:
+        result = await scan_reference(db, *reference, dry_run=dry_run, budget=budget)
+        budget -= result["deleted"]
+        references.append(result)
+        if result["deleted"]:
+            logger.info("Deleted %s orphaned %s (%s)", result["deleted"], result["collection"], result["field"])
+    return {
+        "dry_run": dry_run,
+        "deleted": sum(result["deleted"] for result in references),
+        "complete": all(result["complete"] for result in references),
+        "references": references,
+    }
+
+
+schedule_job("integrity.scan", INTEGRITY_SCAN_INTERVAL_SECONDS)
+
+
+@integrity_router.post("/scan", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+async def start_scan(dry_run: bool = False, db=Depends(get_db)):
+    # dry_run only counts the orphans; poll GET /jobs/{id} for the report
+    job = await submit_job(db, "integrity.scan", {"dry_run": dry_run}, priority=-1)
+    return job_out(job)
@@ -0,0 +1,490 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Optional, Type
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from pydantic import BaseModel, Field, ValidationError
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from database import get_db
+
+logger = logging.getLogger("jobs")
+
+jobs_router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+JOB_COLLECTION = "jobs"
+# Files produced by jobs (exports) are stored in this GridFS bucket
+JOB_FILES_BUCKET = "job_files"
+
+# Jobs run concurrently per worker process
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+# A running job whose lease expires (its worker died) is picked up again
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_RETRY_BACKOFF_SECONDS = int(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "5"))
+JOB_SHUTDOWN_TIMEOUT = float(os.getenv("JOB_SHUTDOWN_TIMEOUT", "20"))
+# Finished jobs (and their files) are deleted after this many days
+JOB_RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "7"))
+JOB_MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("JOB_MAINTENANCE_INTERVAL_SECONDS", "60"))
+
+JobStatus = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+JOB_INDEXES = [
+    [("status", ASCENDING), ("priority", DESCENDING), ("run_after", ASCENDING)],
+    [("status", ASCENDING), ("locked_until", ASCENDING)],
+    [("created_at", DESCENDING)],
+    [("finished_at", ASCENDING)],
+]
+
+# At most one running job per singleton type, across every worker process
+SINGLETON_INDEX = [("type", ASCENDING)]
+SINGLETON_INDEX_OPTIONS = {
+    "name": "singleton_running",
+    "unique": True,
+    "partialFilterExpression": {"status": "running", "singleton": True},
+}
+
+
+class JobHandler:
+    def __init__(self, func: Callable[[Any, dict], Awaitable[Any]], max_concurrency: Optional[int],
+                 singleton: bool, payload_model: Optional[Type[BaseModel]]):
+        self.func = func
+        self.max_concurrency = 1 if singleton else max_concurrency
+        self.singleton = singleton
+        self.payload_model = payload_model
+        # Jobs running in this process, plus slots reserved by claims in flight
+        self.running = 0
+
+    def has_capacity(self) -> bool:
+        return self.max_concurrency is None or self.running < self.max_concurrency
+
+    def parse(self, payload: dict) -> dict:
+        # Raises ValidationError for a payload the handler cannot take
+        if self.payload_model is None:
+            return payload
+        return self.payload_model.model_validate(payload).model_dump()
+
+
+# Registered job types: name -> handler
+job_handlers: Dict[str, JobHandler] = {}
+
+
+# Periodic jobs: name -> (interval in seconds, payload, priority)
+job_schedules: Dict[str, tuple] = {}
+
+
+def job_handler(job_type: str, max_concurrency: Optional[int] = None, singleton: bool = False,
+                payload_model: Optional[Type[BaseModel]] = None):
+    """
+    Register an async function as the handler of job_type. It is called with
+    (db, payload) and its return value is stored as the job result.
+    max_concurrency caps how many jobs of this type one worker process runs at once;
+    singleton allows one running job of this type across all worker processes.
+    Payloads are validated against payload_model when submitted and again when run.
+    """
+    def register(func):
+        job_handlers[job_type] = JobHandler(func, max_concurrency, singleton, payload_model)
+        return func
+    return register
+
+
+def schedule_job(job_type: str, interval: float, payload: Optional[dict] = None, priority: int = -1):
+    """
+    Submit job_type every interval seconds while the runner is up, unless one is
+    already queued or running. An interval of 0 disables the schedule.
+    """
+    if interval > 0:
+        job_schedules[job_type] = (interval, payload or {}, priority)
+
+
+class JobCreate(BaseModel):
+    type: str
+    payload: Dict[str, Any] = {}
+    priority: int = Field(default=0, ge=-10, le=10)
+    max_attempts: int = Field(default=3, ge=1, le=10)
+
+
+class Job(BaseModel):
+    id: str
+    type: str
+    status: JobStatus
+    priority: int
+    attempts: int
+    max_attempts: int
+    created_at: datetime
+    run_after: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+
+
+def job_out(job: dict) -> dict:
+    job = dict(job)
+    job["id"] = str(job.pop("_id"))
+    return job
+
+
+async def ensure_indexes(db):
+    for keys in JOB_INDEXES:
+        await db[JOB_COLLECTION].create_index(keys)
+    try:
+        await db[JOB_COLLECTION].create_index(SINGLETON_INDEX, **SINGLETON_INDEX_OPTIONS)
+    except OperationFailure as e:
+        # Duplicates left running by earlier versions; the claim filter still applies
+        logger.warning("Could not create the singleton job index: %s", e)
+
+
+async def job_pending(db, job_type: str) -> bool:
+    # Whether a job of job_type is queued or running
+    return await db[JOB_COLLECTION].count_documents(
+        {"type": job_type, "status": {"$in": ["queued", "running"]}}, limit=1
+    ) > 0
+
+
+async def submit_job(db, job_type: str, payload: Optional[dict] = None,
+                     priority: int = 0, max_attempts: int = 3) -> dict:
+    handler = job_handlers.get(job_type)
+    if handler is None:
+        raise HTTPException(status_code=400, detail=f"Unknown job type {job_type}")
+    try:
+        payload = handler.parse(payload or {})
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    now = datetime.now()
+    job = {
+        "type": job_type,
+        "payload": payload,
+        "singleton": handler.singleton,
+        "status": "queued",
+        "priority": priority,
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "created_at": now,
+        "run_after": now,
+        "started_at": None,
+        "finished_at": None,
+        "locked_by": None,
+        "locked_until": None,
+        "result": None,
+        "error": None,
+    }
+    result = await db[JOB_COLLECTION].insert_one(job)
+    job["_id"] = result.inserted_id
+    if runner is not None:
+        runner.wake()
+    return job
+
+
+class JobRunner:
+    """
+    Claims jobs from the queue collection and runs them on this worker's event loop.
+    Claiming is one atomic find_one_and_update, so several processes can share the queue.
+    """
+
+    def __init__(self, db, concurrency: int = JOB_WORKERS):
+        self.db = db
+        self.concurrency = concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._schedules: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    def wake(self):
+        self._wakeup.set()
+
+    async def start(self):
+        await ensure_indexes(self.db)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        self._schedules = [
+            asyncio.create_task(self._schedule(job_type, *schedule))
+            for job_type, schedule in job_schedules.items()
+        ]
+        self._schedules.append(asyncio.create_task(self._maintain()))
+
+    async def stop(self):
+        # Stop claiming, give running jobs time to finish, then cancel them;
+        # their leases expire and another worker retries them
+        self._stopping = True
+        self.wake()
+        for task in self._schedules:
+            task.cancel()
+        await asyncio.gather(*self._schedules, return_exceptions=True)
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(self._tasks, timeout=JOB_SHUTDOWN_TIMEOUT)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _claim(self) -> Optional[dict]:
+        # Reserve a slot in every type with capacity before the round trip, so this
+        # process's other workers cannot claim past max_concurrency meanwhile
+        available = [name for name, handler in job_handlers.items() if handler.has_capacity()]
+        for name in available:
+            job_handlers[name].running += 1
+        job = None
+        try:
+            job = await self._claim_from(available)
+            return job
+        finally:
+            # The claimed job keeps its slot; _run releases it
+            for name in available:
+                if job is None or name != job["type"]:
+                    job_handlers[name].running -= 1
+
+    async def _claim_from(self, types: List[str], attempts: int = 3) -> Optional[dict]:
+        if not types:
+            return None
+        collection = self.db[JOB_COLLECTION]
+        singletons = [name for name in types if job_handlers[name].singleton]
+        for _ in range(attempts):
+            now = datetime.now()
+            # Singleton types running anywhere only have their expired job reclaimed
+            busy = await collection.distinct(
+                "type", {"status": "running", "singleton": True, "type": {"$in": singletons}}
+            ) if singletons else []
+            try:
+                return await collection.find_one_and_update(
+                    {
+                        "$or": [
+                            {"status": "queued", "run_after": {"$lte": now},
+                             "type": {"$in": [name for name in types if name not in busy]}},
+                            # Expired leases are retried while attempts remain; _maintain fails the rest
+                            {"status": "running", "locked_until": {"$lt": now}, "type": {"$in": types},
+                             "$expr": {"$lt": ["$attempts", "$max_attempts"]}},
+                        ],
+                    },
+                    {
+                        "$set": {
+                            "status": "running",
+                            "started_at": now,
+                            "locked_by": self.worker_id,
+                            "locked_until": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                        },
+                        "$inc": {"attempts": 1},
+                    },
+                    sort=[("priority", DESCENDING), ("run_after", ASCENDING)],
+                    return_document=ReturnDocument.AFTER,
+                )
+            except DuplicateKeyError:
+                # Another process started a job of the same singleton type first; look again
+                continue
+        return None
+
+    async def _heartbeat(self, job_id: ObjectId):
+        # Keep extending the lease while a long job runs
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            await self.db[JOB_COLLECTION].update_one(
+                {"_id": job_id, "locked_by": self.worker_id},
+                {"$set": {"locked_until": datetime.now() + timedelta(seconds=JOB_LEASE_SECONDS)}},
+            )
+
+    async def _finish(self, job: dict, fields: dict):
+        # Only the worker holding the lease may record the outcome
+        await self.db[JOB_COLLECTION].update_one(
+            {"_id": job["_id"], "locked_by": self.worker_id, "status": "running"},
+            {"$set": {**fields, "locked_by": None, "locked_until": None}},
+        )
+
+    async def _run(self, job: dict):
+        # The slot was reserved by _claim
+        handler = job_handlers[job["type"]]
+        heartbeat = asyncio.create_task(self._heartbeat(job["_id"]))
+        try:
+            result = await handler.func(self.db, handler.parse(job.get("payload") or {}))
+        except ValidationError as e:
+            # Retrying cannot fix an invalid payload
+            logger.error("Job %s (%s) has an invalid payload: %s", job["_id"], job["type"], e)
+            await self._finish(job, {"status": "failed", "finished_at": datetime.now(), "error": str(e)})
+        except Exception as e:
+            logger.exception("Job %s (%s) failed on attempt %s", job["_id"], job["type"], job["attempts"])
+            if job["attempts"] < job["max_attempts"]:
+                delay = JOB_RETRY_BACKOFF_SECONDS * 2 ** (job["attempts"] - 1)
+                await self._finish(job, {
+                    "status": "queued",
+                    "run_after": datetime.now() + timedelta(seconds=delay),
+                    "error": str(e),
+                })
+            else:
+                await self._finish(job, {"status": "failed", "finished_at": datetime.now(), "error": str(e)})
+        else:
+            await self._finish(job, {
+                "status": "succeeded", "finished_at": datetime.now(), "result": result, "error": None,
+            })
+        finally:
+            heartbeat.cancel()
+            handler.running -= 1
+
+    async def _schedule(self, job_type: str, interval: float, payload: dict, priority: int):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                # Every worker process runs the schedule; skip if another already submitted
+                if not await job_pending(self.db, job_type):
+                    await submit_job(self.db, job_type, payload, priority)
+            except Exception:
+                logger.exception("Could not submit scheduled job %s", job_type)
+
+    async def _fail_exhausted(self) -> int:
+        # Jobs whose worker died on the last attempt, e.g. killed for running out of memory
+        now = datetime.now()
+        result = await self.db[JOB_COLLECTION].update_many(
+            {"status": "running", "locked_until": {"$lt": now}, "$expr": {"$gte": ["$attempts", "$max_attempts"]}},
+            {"$set": {
+                "status": "failed", "finished_at": now, "locked_by": None, "locked_until": None,
+                "error": "Lease expired on the last attempt",
+            }},
+        )
+        return result.modified_count
+
+    async def _purge_finished(self, batch_size: int = 500) -> int:
+        # Delete finished jobs past JOB_RETENTION_DAYS, and the files they produced
+        cutoff = datetime.now() - timedelta(days=JOB_RETENTION_DAYS)
+        expired = await self.db[JOB_COLLECTION].find(
+            {"finished_at": {"$lt": cutoff}}, {"result": 1}
+        ).limit(batch_size).to_list(None)
+        if not expired:
+            return 0
+        bucket = None
+        for job in expired:
+            file_id = job["result"].get("file_id") if isinstance(job.get("result"), dict) else None
+            if file_id is not None:
+                bucket = bucket or AsyncIOMotorGridFSBucket(self.db, bucket_name=JOB_FILES_BUCKET)
+                try:
+                    await bucket.delete(ObjectId(file_id))
+                except NoFile:
+                    pass
+        result = await self.db[JOB_COLLECTION].delete_many({"_id": {"$in": [job["_id"] for job in expired]}})
+        return result.deleted_count
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(JOB_MAINTENANCE_INTERVAL_SECONDS)
+            try:
+                failed = await self._fail_exhausted()
+                if failed:
+                    logger.warning("Failed %s jobs whose lease expired on their last attempt", failed)
+                await self._purge_finished()
+            except Exception:
+                logger.exception("Job maintenance failed")
+
+    async def _work(self):
+        while not self._stopping:
+            try:
+                job = await self._claim()
+            except Exception:
+                logger.exception("Could not claim a job")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+
+# Runner of this worker process, created by the app lifespan
+runner: Optional[JobRunner] = None
+
+
+async def store_file(db, filename: str, chunks, content_type: str) -> str:
+    """
+    Write an async iterable of bytes into GridFS and return the file id, for jobs producing files
+    """
+    bucket = AsyncIOMotorGridFSBucket(db, bucket_name=JOB_FILES_BUCKET)
+    stream = bucket.open_upload_stream(filename, metadata={"content_type": content_type})
+    try:
+        async for chunk in chunks:
+            await stream.write(chunk)
+    except Exception:
+        await stream.abort()
+        raise
+    await stream.close()
+    return str(stream._id)
+
+
+# Job endpoints
+@jobs_router.post("/", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(job: JobCreate, db=Depends(get_db)):
+    created = await submit_job(db, job.type, job.payload, job.priority, job.max_attempts)
+    return job_out(created)
+
+
+@jobs_router.get("/", response_model=List[Job])
+async def get_jobs(status: Optional[JobStatus] = None, type: Optional[str] = None,
+                   limit: int = 50, db=Depends(get_db)):
+    query = {}
+    if status:
+        query["status"] = status
+    if type:
+        query["type"] = type
+    jobs = await db[JOB_COLLECTION].find(query, {"payload": 0}).sort("created_at", -1).limit(min(limit, 500)).to_list(500)
+    return [job_out(job) for job in jobs]
+
+
+@jobs_router.get("/{job_id}", response_model=Job)
+async def get_job(job_id: str, db=Depends(get_db)):
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job ID format")
+    job = await db[JOB_COLLECTION].find_one({"_id": ObjectId(job_id)}, {"payload": 0})
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_out(job)
+
+
+@jobs_router.delete("/{job_id}", response_model=Job)
+async def cancel_job(job_id: str, db=Depends(get_db)):
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job ID format")
+    # Only jobs that have not started can be cancelled
+    job = await db[JOB_COLLECTION].find_one_and_update(
+        {"_id": ObjectId(job_id), "status": "queued"},
+        {"$set": {"status": "cancelled", "finished_at": datetime.now()}},
+        projection={"payload": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    if job is None:
+        if await db[JOB_COLLECTION].count_documents({"_id": ObjectId(job_id)}, limit=1) == 0:
+            raise HTTPException(status_code=404, detail="Job not found")
+        raise HTTPException(status_code=409, detail="Only queued jobs can be cancelled")
+    return job_out(job)
+
+
+@jobs_router.get("/{job_id}/file")
+async def download_job_file(job_id: str, db=Depends(get_db)):
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job ID format")
+    job = await db[JOB_COLLECTION].find_one({"_id": ObjectId(job_id)}, {"status": 1, "result": 1})
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    file_id = (job.get("result") or {}).get("file_id") if isinstance(job.get("result"), dict) else None
+    if job.get("status") != "succeeded" or file_id is None:
+        raise HTTPException(status_code=404, detail="Job has no file")
+
+    bucket = AsyncIOMotorGridFSBucket(db, bucket_name=JOB_FILES_BUCKET)
+    stream = await bucket.open_download_stream(ObjectId(file_id))
+
+    async def chunks():
+        while True:
+            chunk = await stream.readchunk()
+            if not chunk:
+                break
+            yield chunk
+
+    content_type = (stream.metadata or {}).get("content_type", "application/octet-stream")
+    return StreamingResponse(
+        chunks(),
+        media_type=content_type,
+        headers={"Content-Disposition": f'attachment; filename="{stream.filename}"'},
+    )
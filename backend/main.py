@@ -1,30 +1,101 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, status
 from fastapi.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import ReturnDocument
+from pymongo import ReturnDocument, UpdateOne
 from pydantic import BaseModel, Field, GetCoreSchemaHandler, GetJsonSchemaHandler
-from typing import List, Optional, Dict, Any, Annotated
+from typing import List, Optional, Dict, Any, Annotated, Literal, get_args
 from datetime import datetime
-from bson import ObjectId
+from contextlib import asynccontextmanager
+from bson import ObjectId, json_util
+import asyncio
+import logging
 import os
 from dotenv import load_dotenv
 from pydantic_core import core_schema
 from passlib.context import CryptContext
 import auth
 import AI
+import analytics
+import database
+import encoding
+import health
+import integrity
+import jobs
+import metrics
+import profiling
 from AI import ai_router
-from pymongo.mongo_client import MongoClient
-from pymongo.server_api import ServerApi
 #password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto") 
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger("hospital")
+
+uri = os.getenv("mongo_uri")
+# Created in the lifespan, once per worker process
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+# Upper bound on startup checks, so an unreachable database does not hold a worker back
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "10"))
+
+async def check_database():
+    await client.admin.command('ping')
+    await database.ensure_indexes(db)
+    await auth.users_collection.create_index("username")
+
+async def warmup():
+    # Check the connection and indexes so the first requests do not pay for them
+    try:
+        await asyncio.wait_for(check_database(), WARMUP_TIMEOUT)
+        logger.info("Connected to MongoDB and verified indexes")
+    except Exception as e:
+        logger.warning("MongoDB warmup failed: %r", e)
+
+    try:
+        loaded = await asyncio.wait_for(AI.preload_model(), WARMUP_TIMEOUT)
+    except asyncio.TimeoutError:
+        loaded = False
+    if loaded:
+        logger.info("Preloaded Ollama model %s", AI.MODEL_NAME)
+    else:
+        logger.warning("Could not preload Ollama model %s", AI.MODEL_NAME)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global client, db
+    # The benchmark harness injects its own client before startup
+    if client is None:
+        client = database.create_client(uri)
+        db = client[database.DB_NAME]
+    if auth.users_collection is None:
+        auth.users_collection = client[database.STAFF_DB_NAME]["staff"]
+    app.state.mongo_client = client
+    app.state.db = db
+
+    await warmup()
+    if jobs.JOB_WORKERS > 0:
+        jobs.runner = jobs.JobRunner(db)
+        await jobs.runner.start()
+    yield
+
+    # The server has stopped accepting connections and finished in-flight requests
+    if jobs.runner is not None:
+        await jobs.runner.stop()
+    await AI.ollama_client.close()
+    client.close()
+
 # Initialize FastAPI
-app = FastAPI(title="Hospital Management System API")
+app = FastAPI(title="Hospital Management System API", lifespan=lifespan)
 app.include_router(auth.route)
 app.include_router(AI.ai_router)
+app.include_router(analytics.analytics_router)
+app.include_router(health.health_router)
+app.include_router(integrity.integrity_router)
+app.include_router(jobs.jobs_router)
+app.include_router(metrics.metrics_router)
+app.include_router(profiling.profiling_router)
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -32,18 +103,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the frontend read the cursor of the next page
+    expose_headers=[encoding.NEXT_CURSOR_HEADER],
 )
-
-uri = os.getenv("mongo_uri")
-# Create a new client and connect to the server
-client = AsyncIOMotorClient(uri, server_api=ServerApi('1'))
-db = client["hospital_management"]
-# Send a ping to confirm a successful connection
-try:
-    client.admin.command('ping')
-    print("Pinged your deployment. You successfully connected to MongoDB!")
-except Exception as e:
-    print(e)
+# Per-route latency, status code and in-flight metrics, exposed at /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+# Slow-request traces and opt-in pyinstrument profiles, served under /admin/traces
+app.add_middleware(profiling.ProfilingMiddleware)
 
 # PyObjectId for MongoDB ObjectId handling - Compatible with Pydantic v2
 class PyObjectId(str):
@@ -99,6 +165,17 @@ class Patient(PatientBase):
     id: Annotated[str, Field(alias="_id", default=None)]
     admission_date: datetime = Field(default_factory=datetime.now)
 
+# Partial update: only the fields sent by the client are written. Fields required
+# on the base model may be omitted but not set to null.
+class PatientUpdate(BaseModel):
+    name: str = None
+    age: int = None
+    gender: str = None
+    contact: str = None
+    address: str = None
+    blood_type: Optional[str] = None
+    medical_history: Optional[str] = None
+
 class VitalSigns(BaseModel):
     temperature: Optional[float] = None
     blood_pressure: Optional[str] = None
@@ -142,6 +219,12 @@ class PatientDetailsBase(BaseModel):
 class PatientDetails(PatientDetailsBase):
     id: Annotated[str, Field(alias="_id", default=None)]
 
+class PatientDetailsUpdate(BaseModel):
+    emergency_contact: Optional[str] = None
+    insurance_info: Optional[Dict[str, Any]] = None
+    allergies: Optional[List[str]] = None
+    current_medication: Optional[List[str]] = None
+
 class PatientHistoryBase(BaseModel):
     patient_id: str
     medical_records: List[MedicalRecord] = []
@@ -175,6 +258,13 @@ class DoctorCreate(DoctorBase):
 class Doctor(DoctorBase):
     id: Annotated[str, Field(alias="_id", default=None)]
 
+class DoctorUpdate(BaseModel):
+    name: str = None
+    specialization: str = None
+    contact: str = None
+    email: str = None
+    schedule: Optional[dict] = None
+
 class AppointmentBase(BaseModel):
     AppointmentId : str
     PatientId: str
@@ -194,6 +284,36 @@ class AppointmentCreate(AppointmentBase):
 
 class Appointment(AppointmentBase):
     id: Annotated[str, Field(alias="_id", default=None)]
+
+# Status changes go through the status endpoints so the transitions are enforced
+class AppointmentUpdate(BaseModel):
+    PatientId: str = None
+    DoctorId: str = None
+    date: datetime = None
+    notes: Optional[str] = None
+
+AppointmentStatus = Literal["scheduled", "completed", "cancelled"]
+
+# Allowed appointment status transitions: target status -> statuses it can be reached from
+APPOINTMENT_TRANSITIONS: Dict[str, List[str]] = {
+    "completed": ["scheduled"],
+    "cancelled": ["scheduled"],
+}
+
+class AppointmentStatusUpdate(BaseModel):
+    status: AppointmentStatus
+    notes: Optional[str] = None
+
+class AppointmentStatusChange(AppointmentStatusUpdate):
+    AppointmentId: str
+
+class AppointmentStatusBatch(BaseModel):
+    updates: List[AppointmentStatusChange] = Field(..., min_length=1, max_length=1000)
+
+class AppointmentStatusBatchResult(BaseModel):
+    requested: int
+    updated: int
+    rejected: List[Dict[str, Any]] = []
     
 # class StaffRegister(BaseModel):
 #     staff_id: str
@@ -222,6 +342,13 @@ class Appointment(AppointmentBase):
 
      
 
+def sparse_update(update: BaseModel) -> Dict[str, Any]:
+    # Fields the client actually sent, so PATCH never overwrites the rest of the document
+    fields = update.model_dump(exclude_unset=True)
+    if not fields:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    return fields
+
 # Patient endpoints
 @app.post("/patients/", response_model=Patient, status_code=status.HTTP_201_CREATED)
 async def create_patient(patient: PatientCreate):
@@ -236,12 +363,10 @@ async def create_patient(patient: PatientCreate):
         created_patient["_id"] = str(created_patient["_id"])
         return created_patient
 
-@app.get("/patients/", response_model=List[Patient])
-async def get_patients():
-    patients = await db.patients.find().to_list(1000)
-    for patient in patients:
-        patient["_id"] = str(patient["_id"])
-    return patients
+@app.get("/patients/", response_model=List[Patient], responses=encoding.LIST_RESPONSES)
+async def get_patients(options: encoding.ListOptions = Depends()):
+    patients = await options.find(db.patients, {}, Patient)
+    return options.render(patients)
 
 @app.get("/patients/{patient_id}", response_model=Patient)
 async def get_patient(patient_id: str):
@@ -270,15 +395,30 @@ async def update_patient(patient_id: str, patient: PatientBase):
     updated_patient["_id"] = str(updated_patient["_id"])
     return updated_patient
 
+@app.patch("/patients/{patient_id}", response_model=Patient)
+async def patch_patient(patient_id: str, patient: PatientUpdate):
+    updated_patient = await db.patients.find_one_and_update(
+        {"PatientId": patient_id},
+        {"$set": sparse_update(patient)},
+        return_document=ReturnDocument.AFTER
+    )
+    
+    if updated_patient is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    
+    updated_patient["_id"] = str(updated_patient["_id"])
+    return updated_patient
+
 @app.delete("/patients/{patient_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_patient(patient_id: str):
     check = await db.patients.find_one({"PatientId":patient_id})
     if(check is None):
         raise HTTPException(status_code=404,detail="Patient not found")
     
-    deleted = await db.patients.delete_one({"PatientId": patient_id})
+    # Details, history, summary and appointments go with the patient
+    deleted = await integrity.cascade_delete(db, "patients", check)
     
-    if deleted.deleted_count == 0:
+    if deleted["patients"] == 0:
         raise HTTPException(status_code=404, detail="Patient not found")
     
     return None
@@ -335,6 +475,23 @@ async def update_patient_details(patient_id: str, patient_details: PatientDetail
     updated_details["_id"] = str(updated_details["_id"])
     return updated_details
 
+@app.patch("/patient-details/{patient_id}", response_model=PatientDetails)
+async def patch_patient_details(patient_id: str, patient_details: PatientDetailsUpdate):
+    if not ObjectId.is_valid(patient_id):
+        raise HTTPException(status_code=400, detail="Invalid patient ID format")
+    
+    updated_details = await db.patient_details.find_one_and_update(
+        {"patient_id": patient_id},
+        {"$set": sparse_update(patient_details)},
+        return_document=ReturnDocument.AFTER
+    )
+    
+    if updated_details is None:
+        raise HTTPException(status_code=404, detail="Patient details not found")
+    
+    updated_details["_id"] = str(updated_details["_id"])
+    return updated_details
+
 # Patient History endpoints
 @app.post("/patient-history/", response_model=PatientHistory, status_code=status.HTTP_201_CREATED)
 async def create_patient_history(patient_history: PatientHistoryBase):
@@ -352,6 +509,8 @@ async def create_patient_history(patient_history: PatientHistoryBase):
         raise HTTPException(status_code=400, detail="Patient history already exists")
     
     patient_history_dict = patient_history.model_dump()
+    # version and updated_at let the summarization job find changed histories
+    patient_history_dict.update({"version": 1, "updated_at": datetime.now()})
     new_history = await db.patient_history.insert_one(patient_history_dict)
     created_history = await db.patient_history.find_one({"_id": new_history.inserted_id})
     created_history["_id"] = str(created_history["_id"])
@@ -389,7 +548,9 @@ async def add_medical_record(patient_id: str, medical_record: MedicalRecord):
         # Create new history with this record
         new_history = {
             "patient_id": patient_id,
-            "medical_records": [medical_record_dict]
+            "medical_records": [medical_record_dict],
+            "version": 1,
+            "updated_at": datetime.now()
         }
         result = await db.patient_history.insert_one(new_history)
         created_history = await db.patient_history.find_one({"_id": result.inserted_id})
@@ -399,7 +560,11 @@ async def add_medical_record(patient_id: str, medical_record: MedicalRecord):
         # Update existing history
         updated_history = await db.patient_history.find_one_and_update(
             {"patient_id": patient_id},
-            {"$push": {"medical_records": medical_record_dict}},
+            {
+                "$push": {"medical_records": medical_record_dict},
+                "$inc": {"version": 1},
+                "$set": {"updated_at": datetime.now()}
+            },
             return_document=ReturnDocument.AFTER
         )
         updated_history["_id"] = str(updated_history["_id"])
@@ -416,12 +581,10 @@ async def create_doctor(doctor: DoctorCreate):
     created_doctor["_id"] = str(created_doctor["_id"])
     return created_doctor
 
-@app.get("/doctors/", response_model=List[Doctor])
-async def get_doctors():
-    doctors = await db.doctors.find().to_list(1000)
-    for doctor in doctors:
-        doctor["_id"] = str(doctor["_id"])
-    return doctors
+@app.get("/doctors/", response_model=List[Doctor], responses=encoding.LIST_RESPONSES)
+async def get_doctors(options: encoding.ListOptions = Depends()):
+    doctors = await options.find(db.doctors, {}, Doctor)
+    return options.render(doctors)
 
 @app.get("/doctors/{doctor_id}", response_model=Doctor)
 async def get_doctor(doctor_id: str):
@@ -455,15 +618,30 @@ async def update_doctor(doctor_id: str, doctor: DoctorBase):
     updated_doctor["_id"] = str(updated_doctor["_id"])
     return updated_doctor
 
+@app.patch("/doctors/{doctor_id}", response_model=Doctor)
+async def patch_doctor(doctor_id: str, doctor: DoctorUpdate):
+    updated_doctor = await db.doctors.find_one_and_update(
+        {"DoctorId": doctor_id},
+        {"$set": sparse_update(doctor)},
+        return_document=ReturnDocument.AFTER
+    )
+    
+    if updated_doctor is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    
+    updated_doctor["_id"] = str(updated_doctor["_id"])
+    return updated_doctor
+
 @app.delete("/doctors/{doctor_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_doctor(doctor_id: str):
     check = await db.doctors.find_one({"DoctorId":doctor_id})
     if(check is None):
         raise HTTPException(status_code=404,detail="Doctor not found")
     
-    deleted = await db.doctors.delete_one({"DoctorId":doctor_id})
+    # The doctor's appointments go with them
+    deleted = await integrity.cascade_delete(db, "doctors", check)
     
-    if deleted.deleted_count == 0:
+    if deleted["doctors"] == 0:
         raise HTTPException(status_code=404, detail="Doctor not found")
     
     return None
@@ -486,15 +664,14 @@ async def create_appointment(appointment: AppointmentCreate):
     appointment_dict = appointment.model_dump()
     new_appointment = await db.appointments.insert_one(appointment_dict)
     created_appointment = await db.appointments.find_one({"_id": new_appointment.inserted_id})
+    await analytics.record_appointment(db, created_appointment, 1, doctor.get("specialization"))
     created_appointment["_id"] = str(created_appointment["_id"])
     return created_appointment
 
-@app.get("/appointments/", response_model=List[Appointment])
-async def get_appointments():
-    appointments = await db.appointments.find().to_list(1000)
-    for appointment in appointments:
-        appointment["_id"] = str(appointment["_id"])
-    return appointments
+@app.get("/appointments/", response_model=List[Appointment], responses=encoding.LIST_RESPONSES)
+async def get_appointments(options: encoding.ListOptions = Depends()):
+    appointments = await options.find(db.appointments, {}, Appointment)
+    return options.render(appointments)
 
 @app.get("/appointments/{appointment_id}", response_model=Appointment)
 async def get_appointment(appointment_id: str):
@@ -507,58 +684,210 @@ async def get_appointment(appointment_id: str):
 
 
 
+async def check_appointment_references(appointment: Dict[str, Any]):
+    # The existence checks of create_appointment, for the ids being written
+    if "PatientId" in appointment and not await db.patients.count_documents({"PatientId": appointment["PatientId"]}, limit=1):
+        raise HTTPException(status_code=404, detail="Patient not found")
+    if "DoctorId" in appointment and not await db.doctors.count_documents({"DoctorId": appointment["DoctorId"]}, limit=1):
+        raise HTTPException(status_code=404, detail="Doctor not found")
+
 @app.put("/appointments/{appointment_id}", response_model=Appointment)
 async def update_appointment(appointment_id: str, appointment: AppointmentBase):
-    exists = await db.appointments.find_one({"AppointmentId": appointment_id})
-    if exists is None:
-        raise HTTPException(status_code=404, detail="Appointment not found")
-    appointment_dict = appointment.model_dump()
-    updated_appointment = await db.appointments.find_one_and_update(
-        {"AppointmentId":appointment_id},
+    # Status changes go through the status endpoints; a status sent here must match the stored one
+    appointment_dict = appointment.model_dump(exclude={"status"})
+    # Stored as naive UTC; the rollups and the response use the stored value
+    appointment_dict["date"] = analytics.naive_utc(appointment_dict["date"])
+    await check_appointment_references(appointment_dict)
+    query = {"AppointmentId": appointment_id}
+    if "status" in appointment.model_fields_set:
+        query["status"] = appointment.status
+    # The previous version tells the rollups what moved
+    previous = await db.appointments.find_one_and_update(
+        query,
         {"$set":appointment_dict},
-        return_document=ReturnDocument.AFTER
+        return_document=ReturnDocument.BEFORE
     )
     
-    if updated_appointment is None:
+    if previous is None:
+        current = await db.appointments.find_one({"AppointmentId": appointment_id}, {"status": 1})
+        if current is None:
+            raise HTTPException(status_code=404, detail="Appointment not found")
+        raise HTTPException(
+            status_code=409,
+            detail=f"Appointment is {current.get('status')}; change the status with PATCH /appointments/{appointment_id}/status"
+        )
+    
+    updated_appointment = {**previous, **appointment_dict}
+    await analytics.record_appointment_change(db, previous, updated_appointment)
+    updated_appointment["_id"] = str(updated_appointment["_id"])
+    return updated_appointment
+
+@app.patch("/appointments/{appointment_id}", response_model=Appointment)
+async def patch_appointment(appointment_id: str, appointment: AppointmentUpdate):
+    fields = sparse_update(appointment)
+    if "date" in fields:
+        # Stored as naive UTC; the rollups and the response use the stored value
+        fields["date"] = analytics.naive_utc(fields["date"])
+    await check_appointment_references(fields)
+    previous = await db.appointments.find_one_and_update(
+        {"AppointmentId": appointment_id},
+        {"$set": fields},
+        return_document=ReturnDocument.BEFORE
+    )
+    
+    if previous is None:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
+    updated_appointment = {**previous, **fields}
+    await analytics.record_appointment_change(db, previous, updated_appointment)
+    updated_appointment["_id"] = str(updated_appointment["_id"])
+    return updated_appointment
+
+def status_change(update: AppointmentStatusUpdate, now: Optional[datetime] = None):
+    """
+    Filter and update for a status transition. The current status is part of the
+    filter, so the check and the write happen atomically in one round trip.
+    """
+    allowed_from = APPOINTMENT_TRANSITIONS.get(update.status, [])
+    fields = {"status": update.status, "status_updated_at": now or datetime.now()}
+    if update.notes is not None:
+        fields["notes"] = update.notes
+    return {"status": {"$in": allowed_from}}, {"$set": fields}
+
+@app.patch("/appointments/{appointment_id}/status", response_model=Appointment)
+async def update_appointment_status(appointment_id: str, update: AppointmentStatusUpdate):
+    status_filter, status_update = status_change(update)
+    previous = await db.appointments.find_one_and_update(
+        {"AppointmentId": appointment_id, **status_filter},
+        status_update,
+        return_document=ReturnDocument.BEFORE
+    )
+    
+    if previous is None:
+        # Only the failure path pays for a second read, to tell missing from invalid
+        current = await db.appointments.find_one({"AppointmentId": appointment_id}, {"status": 1})
+        if current is None:
+            raise HTTPException(status_code=404, detail="Appointment not found")
+        raise HTTPException(
+            status_code=409,
+            detail=f"Cannot change appointment status from {current.get('status')} to {update.status}"
+        )
+    
+    updated_appointment = {**previous, **status_update["$set"]}
+    await analytics.record_status_changes(db, [(updated_appointment, previous.get("status"))])
     updated_appointment["_id"] = str(updated_appointment["_id"])
     return updated_appointment
 
+# Batch status update, e.g. closing the day's appointments
+@app.post("/appointments/status/batch", response_model=AppointmentStatusBatchResult)
+async def update_appointment_statuses(batch: AppointmentStatusBatch):
+    # Each appointment is changed once; repeated entries are rejected
+    requested = {}
+    rejected = []
+    for change in batch.updates:
+        if change.AppointmentId in requested:
+            rejected.append({"AppointmentId": change.AppointmentId, "reason": "duplicate in batch"})
+        else:
+            requested[change.AppointmentId] = change
+    # Current state of every appointment in the batch, for rejections and the rollups
+    current = await db.appointments.find(
+        {"AppointmentId": {"$in": list(requested)}},
+        {"AppointmentId": 1, "DoctorId": 1, "date": 1, "status": 1}
+    ).to_list(len(requested))
+    current = {doc["AppointmentId"]: doc for doc in current}
+    
+    operations = []
+    transitions = []
+    # One timestamp for the batch, at the millisecond precision MongoDB stores, marks its writes
+    now = datetime.now()
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    for appointment_id, change in requested.items():
+        existing = current.get(appointment_id)
+        if existing is None:
+            rejected.append({"AppointmentId": appointment_id, "reason": "not found"})
+            continue
+        if existing.get("status") not in APPOINTMENT_TRANSITIONS.get(change.status, []):
+            rejected.append({
+                "AppointmentId": appointment_id,
+                "reason": f"cannot change status from {existing.get('status')} to {change.status}"
+            })
+            continue
+        status_filter, status_update = status_change(change, now)
+        operations.append(UpdateOne({"AppointmentId": appointment_id, **status_filter}, status_update))
+        transitions.append(({**existing, **status_update["$set"]}, existing.get("status")))
+    
+    updated = 0
+    if operations:
+        # The status filter is still applied, so a concurrent change makes its update a no-op
+        result = await db.appointments.bulk_write(operations, ordered=False)
+        updated = result.modified_count
+        if updated != len(transitions):
+            # Some appointments changed meanwhile; count only the writes that carry this batch's stamp
+            applied = await db.appointments.find(
+                {"AppointmentId": {"$in": [appointment["AppointmentId"] for appointment, _ in transitions]},
+                 "status_updated_at": now},
+                {"AppointmentId": 1, "status": 1}
+            ).to_list(None)
+            applied = {doc["AppointmentId"]: doc.get("status") for doc in applied}
+            confirmed = []
+            for appointment, old_status in transitions:
+                if applied.get(appointment["AppointmentId"]) == appointment["status"]:
+                    confirmed.append((appointment, old_status))
+                else:
+                    rejected.append({"AppointmentId": appointment["AppointmentId"], "reason": "status changed concurrently"})
+            transitions = confirmed
+        await analytics.record_status_changes(db, transitions)
+    
+    return {"requested": len(batch.updates), "updated": updated, "rejected": rejected}
+
 @app.delete("/appointments/{appointment_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_appointment(appointment_id: str):
-    check = await db.appointments.find_one({"AppointmentId":appointment_id})
-    if(check is None):
-        raise HTTPException(status_code=404,detail="Appointment not found")
+    deleted = await db.appointments.find_one_and_delete({"AppointmentId":appointment_id})
     
-    deleted = await db.appointments.delete_one({"AppointmentId":appointment_id})
-    
-    if deleted.deleted_count == 0:
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
+    await analytics.record_appointment(db, deleted, -1)
     return None
 
-# Get appointments by patient
-@app.get("/appointments/patient/{patient_id}", response_model=List[Appointment])
-async def get_patient_appointments(patient_id: str):
-    if not ObjectId.is_valid(patient_id):
-        raise HTTPException(status_code=400, detail="Invalid patient ID format")
-    
-    appointments = await db.appointments.find({"patient_id": patient_id}).to_list(1000)
-    for appointment in appointments:
-        appointment["_id"] = str(appointment["_id"])
-    return appointments
+# Appointment timelines: one patient's or doctor's appointments in date order, optionally
+# within [start, end). Each page is one range scan of the (PatientId, date, _id) or
+# (DoctorId, date, _id) index, e.g. a doctor's agenda for a day.
+async def get_appointment_timeline(field: str, parents, parent_id: str, start: Optional[datetime],
+                                   end: Optional[datetime], options: encoding.ListOptions):
+    start, end = analytics.naive_utc(start), analytics.naive_utc(end)
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    window: Dict[str, Any] = {"$type": "date"}
+    if start is not None:
+        window["$gte"] = start
+    if end is not None:
+        window["$lt"] = end
+    appointments = await options.find(
+        db.appointments, {field: parent_id, "date": window}, Appointment, order_by="date",
+    )
+    # Tell an unknown id from an empty timeline
+    if not appointments and options.cursor is None and not await parents.count_documents({field: parent_id}, limit=1):
+        raise HTTPException(status_code=404, detail=f"{'Patient' if field == 'PatientId' else 'Doctor'} not found")
+    return options.render(appointments)
 
-# Get appointments by doctor
-@app.get("/appointments/doctor/{doctor_id}", response_model=List[Appointment])
-async def get_doctor_appointments(doctor_id: str):
-    if not ObjectId.is_valid(doctor_id):
-        raise HTTPException(status_code=400, detail="Invalid doctor ID format")
-    
-    appointments = await db.appointments.find({"doctor_id": doctor_id}).to_list(1000)
-    for appointment in appointments:
-        appointment["_id"] = str(appointment["_id"])
-    return appointments
+@app.get("/appointments/patient/{patient_id}", response_model=List[Appointment], responses=encoding.LIST_RESPONSES)
+async def get_patient_appointments(
+    patient_id: str,
+    start: Optional[datetime] = Query(None, description="Only appointments at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only appointments before this time"),
+    options: encoding.ListOptions = Depends(),
+):
+    return await get_appointment_timeline("PatientId", db.patients, patient_id, start, end, options)
+
+@app.get("/appointments/doctor/{doctor_id}", response_model=List[Appointment], responses=encoding.LIST_RESPONSES)
+async def get_doctor_appointments(
+    doctor_id: str,
+    start: Optional[datetime] = Query(None, description="Only appointments at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only appointments before this time"),
+    options: encoding.ListOptions = Depends(),
+):
+    return await get_appointment_timeline("DoctorId", db.doctors, doctor_id, start, end, options)
 
 # Dashboard statistics endpoints
 @app.get("/dashboard/stats")
@@ -618,8 +947,8 @@ async def get_patient_full_summary(patient_id: str):
     # Get patient history
     patient_history = await db.patient_history.find_one({"patient_id": patient_id})
     
-    # Get appointments
-    appointments = await db.appointments.find({"patient_id": patient_id}).to_list(100)
+    # Get appointments (stored with the business id)
+    appointments = await db.appointments.find({"PatientId": patient.get("PatientId")}).sort("date", 1).to_list(100)
     
     # Convert ObjectId to string for serialization
     patient["_id"] = str(patient["_id"])
@@ -640,39 +969,117 @@ async def get_patient_full_summary(patient_id: str):
         "appointments": appointments
     }
 
+# Bulk import and export, run on the job runner
+async def import_documents(collection, key: str, documents: List[dict]) -> Dict[str, int]:
+    # Skip documents whose business key already exists, in batches of 1000
+    inserted = 0
+    skipped = 0
+    for i in range(0, len(documents), 1000):
+        batch = documents[i:i + 1000]
+        keys = [doc[key] for doc in batch]
+        existing = {doc[key] for doc in await collection.find({key: {"$in": keys}}, {key: 1}).to_list(len(keys))}
+        new_documents = []
+        for doc in batch:
+            if doc[key] in existing:
+                skipped += 1
+            else:
+                existing.add(doc[key])
+                new_documents.append(doc)
+        if new_documents:
+            result = await collection.insert_many(new_documents, ordered=False)
+            inserted += len(result.inserted_ids)
+    return {"inserted": inserted, "skipped": skipped}
+
+class PatientsImport(BaseModel):
+    patients: List[PatientCreate]
+
+class DoctorsImport(BaseModel):
+    doctors: List[DoctorCreate]
+
+ExportableCollection = Literal["patients", "doctors", "appointments"]
+EXPORTABLE_COLLECTIONS = list(get_args(ExportableCollection))
+
+class ExportRequest(BaseModel):
+    collection: ExportableCollection
+
+# Payload models validate jobs submitted through POST /jobs/ as well as the endpoints below
+@jobs.job_handler("patients.import", max_concurrency=1, payload_model=PatientsImport)
+async def import_patients_job(db, payload: dict):
+    now = datetime.now()
+    patients = [{**patient, "admission_date": now} for patient in payload["patients"]]
+    return await import_documents(db.patients, "PatientId", patients)
+
+@jobs.job_handler("doctors.import", max_concurrency=1, payload_model=DoctorsImport)
+async def import_doctors_job(db, payload: dict):
+    return await import_documents(db.doctors, "DoctorId", payload["doctors"])
+
+@jobs.job_handler("export", max_concurrency=2, payload_model=ExportRequest)
+async def export_job(db, payload: dict):
+    collection = payload["collection"]
+    exported = 0
+
+    async def lines():
+        nonlocal exported
+        batch = []
+        async for document in db[collection].find().batch_size(1000):
+            batch.append(json_util.dumps(document))
+            exported += 1
+            if len(batch) == 1000:
+                yield ("\n".join(batch) + "\n").encode()
+                batch = []
+        if batch:
+            yield ("\n".join(batch) + "\n").encode()
+
+    filename = f"{collection}-{datetime.now():%Y%m%d-%H%M%S}.ndjson"
+    file_id = await jobs.store_file(db, filename, lines(), "application/x-ndjson")
+    return {"file_id": file_id, "filename": filename, "documents": exported}
+
+@app.post("/patients/import", response_model=jobs.Job, status_code=status.HTTP_202_ACCEPTED)
+async def import_patients(patients: List[PatientCreate]):
+    job = await jobs.submit_job(db, "patients.import", {"patients": [p.model_dump() for p in patients]})
+    return jobs.job_out(job)
+
+@app.post("/doctors/import", response_model=jobs.Job, status_code=status.HTTP_202_ACCEPTED)
+async def import_doctors(doctors: List[DoctorCreate]):
+    job = await jobs.submit_job(db, "doctors.import", {"doctors": [d.model_dump() for d in doctors]})
+    return jobs.job_out(job)
+
+# The NDJSON file is downloaded from GET /jobs/{id}/file once the job succeeds
+@app.post("/exports/{collection}", response_model=jobs.Job, status_code=status.HTTP_202_ACCEPTED)
+async def export_collection(collection: str):
+    if collection not in EXPORTABLE_COLLECTIONS:
+        raise HTTPException(status_code=400, detail=f"collection must be one of {', '.join(EXPORTABLE_COLLECTIONS)}")
+    job = await jobs.submit_job(db, "export", {"collection": collection}, priority=-1)
+    return jobs.job_out(job)
+
 # Search endpoints
-@app.get("/search/patients")
-async def search_patients(query: str):
+@app.get("/search/patients", responses=encoding.LIST_RESPONSES)
+async def search_patients(query: str, options: encoding.ListOptions = Depends()):
     # Search patients by name, contact, or address
-    results = await db.patients.find({
+    results = await options.find(db.patients, {
         "$or": [
             {"name": {"$regex": query, "$options": "i"}},
             {"contact": {"$regex": query, "$options": "i"}},
             {"address": {"$regex": query, "$options": "i"}}
         ]
-    }).to_list(20)
-    
-    for result in results:
-        result["_id"] = str(result["_id"])
+    }, Patient, default_limit=20)
     
-    return results
+    return options.render(results)
 
-@app.get("/search/doctors")
-async def search_doctors(query: str):
+@app.get("/search/doctors", responses=encoding.LIST_RESPONSES)
+async def search_doctors(query: str, options: encoding.ListOptions = Depends()):
     # Search doctors by name, specialization, or email
-    results = await db.doctors.find({
+    results = await options.find(db.doctors, {
         "$or": [
             {"name": {"$regex": query, "$options": "i"}},
             {"specialization": {"$regex": query, "$options": "i"}},
             {"email": {"$regex": query, "$options": "i"}}
         ]
-    }).to_list(20)
-    
-    for result in results:
-        result["_id"] = str(result["_id"])
+    }, Doctor, default_limit=20)
     
-    return results
+    return options.render(results)
 
+# Development server; use serve.py or gunicorn.conf.py for multi-worker deployments
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,239 @@
+import logging
+import os
+import time
+from fastapi import APIRouter, Response
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, REGISTRY, generate_latest, multiprocess,
+)
+from pymongo import monitoring
+from tracing import add_db_time
+
+logger = logging.getLogger("metrics")
+
+# Queries slower than this (milliseconds) are logged with their collection and command
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+
+# Label used for requests that did not match any route, so random 404 paths
+# cannot blow up the label cardinality
+UNMATCHED_ROUTE = "<unmatched>"
+
+metrics_router = APIRouter(tags=["metrics"])
+
+# HTTP metrics
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route"],
+)
+http_requests_total = Counter(
+    "http_requests_total",
+    "HTTP responses by route and status code",
+    ["method", "route", "status"],
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+# MongoDB metrics
+mongo_command_duration = Histogram(
+    "mongo_command_duration_seconds",
+    "MongoDB command latency by collection",
+    ["command", "collection"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+mongo_command_failures = Counter(
+    "mongo_command_failures_total",
+    "Failed MongoDB commands by collection",
+    ["command", "collection"],
+)
+mongo_slow_queries = Counter(
+    "mongo_slow_queries_total",
+    "MongoDB commands slower than SLOW_QUERY_MS",
+    ["command", "collection"],
+)
+
+# Ollama metrics
+ollama_queue_wait = Histogram(
+    "ollama_queue_wait_seconds",
+    "Time a generation waited for a free Ollama slot",
+    ["model"],
+)
+ollama_time_to_first_token = Histogram(
+    "ollama_time_to_first_token_seconds",
+    "Time from sending a generation to receiving its first token",
+    ["model"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+ollama_generation_duration = Histogram(
+    "ollama_generation_duration_seconds",
+    "Total Ollama generation time, excluding queue wait",
+    ["model"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+)
+ollama_tokens_per_second = Histogram(
+    "ollama_tokens_per_second",
+    "Ollama decode throughput",
+    ["model"],
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 250),
+)
+ollama_requests_total = Counter(
+    "ollama_requests_total",
+    "Ollama generations by outcome",
+    ["model", "outcome"],
+)
+ollama_in_flight = Gauge(
+    "ollama_requests_in_flight",
+    "Ollama generations currently running",
+    ["model"],
+    multiprocess_mode="livesum",
+)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, status codes and in-flight counts per route.
+    Label children are bound once per (method, route) and cached, so the hot path
+    only does a dict lookup.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._in_flight = {}
+        self._durations = {}
+        self._responses = {}
+
+    def _in_flight_for(self, method):
+        child = self._in_flight.get(method)
+        if child is None:
+            child = self._in_flight[method] = http_requests_in_flight.labels(method)
+        return child
+
+    def _duration_for(self, method, route):
+        key = (method, route)
+        child = self._durations.get(key)
+        if child is None:
+            child = self._durations[key] = http_request_duration.labels(method, route)
+        return child
+
+    def _responses_for(self, method, route, status_code):
+        key = (method, route, status_code)
+        child = self._responses.get(key)
+        if child is None:
+            child = self._responses[key] = http_requests_total.labels(method, route, str(status_code))
+        return child
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight = self._in_flight_for(method)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            # The router stores the matched route on the scope, giving us the path template
+            route = scope.get("route")
+            route = route.path if route is not None else UNMATCHED_ROUTE
+            self._duration_for(method, route).observe(elapsed)
+            self._responses_for(method, route, status_code).inc()
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    Records per-collection command timings and logs slow queries.
+    Pass an instance through the client's event_listeners option.
+    """
+
+    def __init__(self, slow_query_ms: float = SLOW_QUERY_MS):
+        self.slow_query_seconds = slow_query_ms / 1000
+        self._pending = {}
+        self._children = {}
+
+    def _children_for(self, command, collection):
+        key = (command, collection)
+        children = self._children.get(key)
+        if children is None:
+            children = self._children[key] = (
+                mongo_command_duration.labels(command, collection),
+                mongo_command_failures.labels(command, collection),
+                mongo_slow_queries.labels(command, collection),
+            )
+        return children
+
+    def started(self, event):
+        command = event.command
+        collection = command.get(event.command_name)
+        if not isinstance(collection, str):
+            # getMore carries the cursor id under its command name
+            collection = command.get("collection", "")
+        self._pending[event.request_id] = collection
+
+    def succeeded(self, event):
+        collection = self._pending.pop(event.request_id, "")
+        seconds = event.duration_micros / 1_000_000
+        duration, _, slow = self._children_for(event.command_name, collection)
+        duration.observe(seconds)
+        add_db_time(seconds)
+        if seconds >= self.slow_query_seconds:
+            slow.inc()
+            logger.warning(
+                "Slow MongoDB %s on %s.%s took %.1f ms",
+                event.command_name, event.database_name, collection, seconds * 1000,
+            )
+
+    def failed(self, event):
+        collection = self._pending.pop(event.request_id, "")
+        seconds = event.duration_micros / 1_000_000
+        duration, failures, _ = self._children_for(event.command_name, collection)
+        duration.observe(seconds)
+        failures.inc()
+        add_db_time(seconds)
+
+
+class OllamaTimer:
+    """
+    Bound Ollama metric children for a single model.
+    AI.py creates one per model and feeds it the timings of each generation.
+    """
+
+    def __init__(self, model: str):
+        self.queue_wait = ollama_queue_wait.labels(model)
+        self.time_to_first_token = ollama_time_to_first_token.labels(model)
+        self.duration = ollama_generation_duration.labels(model)
+        self.tokens_per_second = ollama_tokens_per_second.labels(model)
+        self.in_flight = ollama_in_flight.labels(model)
+        self.succeeded = ollama_requests_total.labels(model, "success")
+        self.failed = ollama_requests_total.labels(model, "error")
+
+    def observe_tokens(self, eval_count, eval_duration_ns):
+        # Ollama reports decode time in nanoseconds on the final chunk
+        if eval_count and eval_duration_ns:
+            self.tokens_per_second.observe(eval_count / (eval_duration_ns / 1_000_000_000))
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    # With several workers each process writes its samples to PROMETHEUS_MULTIPROC_DIR
+    # and any worker can aggregate them
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,190 @@
+import heapq
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
+from pyinstrument import Profiler
+from pyinstrument.renderers import ConsoleRenderer, SpeedscopeRenderer
+import auth
+from tracing import Trace, current_trace
+
+# Fraction of requests profiled with pyinstrument (0 disables sampling)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Allow clients to request a profile with the X-Profile: 1 header
+PROFILE_ALLOW_HEADER = os.getenv("PROFILE_ALLOW_HEADER", "0") == "1"
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+# How many of the slowest requests, and of the latest profiled requests, are kept
+SLOW_REQUESTS_KEPT = int(os.getenv("SLOW_REQUESTS_KEPT", "20"))
+PROFILES_KEPT = int(os.getenv("PROFILES_KEPT", "20"))
+
+PROFILE_HEADER = b"x-profile"
+
+profiling_router = APIRouter(
+    prefix="/admin/traces",
+    tags=["admin"],
+    dependencies=[Depends(auth.get_current_user)],
+)
+
+
+class TraceStore:
+    """
+    Min-heap of the slowest requests seen so far plus a ring buffer of the
+    most recent profiled ones
+    """
+
+    def __init__(self, slow_kept: int = SLOW_REQUESTS_KEPT, profiles_kept: int = PROFILES_KEPT):
+        self.slow_kept = slow_kept
+        self._slowest = []
+        self._profiled = deque(maxlen=profiles_kept)
+        self._lock = threading.Lock()
+
+    def record(self, trace: Trace):
+        with self._lock:
+            if trace.profile is not None:
+                self._profiled.append(trace)
+            if len(self._slowest) < self.slow_kept:
+                heapq.heappush(self._slowest, trace)
+            elif self._slowest and trace.duration > self._slowest[0].duration:
+                heapq.heapreplace(self._slowest, trace)
+
+    def slowest(self) -> list:
+        with self._lock:
+            return sorted(self._slowest, reverse=True)
+
+    def profiled(self) -> list:
+        with self._lock:
+            return list(reversed(self._profiled))
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        with self._lock:
+            for trace in (*self._profiled, *self._slowest):
+                if trace.id == trace_id:
+                    return trace
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._slowest.clear()
+            self._profiled.clear()
+
+
+trace_store = TraceStore()
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware that traces every request into trace_store and runs
+    pyinstrument on sampled or header-requested ones. Unprofiled requests
+    only pay for one small Trace object and a context variable.
+    """
+
+    def __init__(self, app, store: TraceStore = trace_store):
+        self.app = app
+        self.store = store
+
+    def _should_profile(self, scope) -> bool:
+        if PROFILE_ALLOW_HEADER:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return value == b"1"
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(scope["method"], scope["path"])
+        profiler = None
+        if self._should_profile(scope):
+            profiler = Profiler(interval=PROFILE_INTERVAL, async_mode="enabled")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                if profiler is not None:
+                    message["headers"] = [*message.get("headers", []), (b"x-trace-id", trace.id.encode())]
+            await send(message)
+
+        token = current_trace.set(trace)
+        if profiler is not None:
+            profiler.start()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            trace.duration = time.perf_counter() - start
+            if profiler is not None:
+                trace.profile = profiler.stop()
+            current_trace.reset(token)
+            route = scope.get("route")
+            trace.route = route.path if route is not None else None
+            self.store.record(trace)
+
+
+def collapsed_stacks(session) -> str:
+    """
+    Render a pyinstrument session in the folded "frame;frame;frame weight" format
+    read by flamegraph.pl, speedscope and most flamegraph viewers.
+    Weights are self time in microseconds.
+    """
+    lines = []
+
+    def walk(frame, stack):
+        name = f"{frame.function} ({frame.file_path_short}:{frame.line_no})".replace(";", ",")
+        stack = stack + [name]
+        self_time = int(round(frame.total_self_time * 1_000_000))
+        if self_time > 0:
+            lines.append(f"{';'.join(stack)} {self_time}")
+        for child in frame.children:
+            walk(child, stack)
+
+    root = session.root_frame()
+    if root is not None:
+        walk(root, [])
+    return "\n".join(lines) + "\n"
+
+
+# Admin endpoints
+@profiling_router.get("/")
+async def get_slowest_traces():
+    return [trace.to_dict() for trace in trace_store.slowest()]
+
+
+@profiling_router.get("/profiled")
+async def get_profiled_traces():
+    return [trace.to_dict() for trace in trace_store.profiled()]
+
+
+@profiling_router.get("/{trace_id}")
+async def get_trace(trace_id: str):
+    trace = trace_store.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace.to_dict()
+
+
+@profiling_router.get("/{trace_id}/profile")
+async def get_trace_profile(trace_id: str, format: str = "collapsed"):
+    trace = trace_store.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    if trace.profile is None:
+        raise HTTPException(status_code=404, detail="Trace was not profiled")
+
+    if format == "collapsed":
+        return Response(collapsed_stacks(trace.profile), media_type="text/plain")
+    if format == "speedscope":
+        return Response(SpeedscopeRenderer().render(trace.profile), media_type="application/json")
+    if format == "text":
+        return Response(ConsoleRenderer().render(trace.profile), media_type="text/plain")
+    raise HTTPException(status_code=400, detail="format must be one of collapsed, speedscope, text")
+
+
+@profiling_router.delete("/", status_code=204)
+async def clear_traces():
+    trace_store.clear()
+    return None
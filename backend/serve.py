@@ -0,0 +1,22 @@
+import multiprocessing
+import os
+import tempfile
+import uvicorn
+
+# Multi-worker server without gunicorn (e.g. on Windows): python serve.py
+# On Linux prefer: gunicorn -c gunicorn.conf.py main:app
+
+if __name__ == "__main__":
+    workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+    if workers > 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        # Set before the workers start so every process writes to the same place
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="hospital-metrics-")
+
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        workers=workers,
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_TIMEOUT", "30")),
+        timeout_keep_alive=int(os.getenv("KEEPALIVE", "5")),
+    )
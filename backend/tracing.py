@@ -0,0 +1,68 @@
+import contextvars
+import uuid
+from datetime import datetime
+
+# Per-request timing context shared by the profiler, the MongoDB command
+# listener and the Ollama client. Kept free of app imports so any module can use it.
+
+# Trace of the request currently being served, if any
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """
+    Timing of one request, split into database time, LLM time and everything
+    else spent in the application (validation, hashing, serialization, ...)
+    """
+
+    __slots__ = ("id", "method", "route", "path", "status", "started_at",
+                 "duration", "db_seconds", "db_calls", "llm_seconds", "llm_calls", "profile")
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.route = None
+        self.path = path
+        self.status = 500
+        self.started_at = datetime.now()
+        self.duration = 0.0
+        self.db_seconds = 0.0
+        self.db_calls = 0
+        self.llm_seconds = 0.0
+        self.llm_calls = 0
+        self.profile = None
+
+    def __lt__(self, other):
+        return self.duration < other.duration
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "route": self.route,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "db_ms": round(self.db_seconds * 1000, 3),
+            "db_calls": self.db_calls,
+            "llm_ms": round(self.llm_seconds * 1000, 3),
+            "llm_calls": self.llm_calls,
+            "app_ms": round(max(0.0, self.duration - self.db_seconds - self.llm_seconds) * 1000, 3),
+            "profiled": self.profile is not None,
+        }
+
+
+def add_db_time(seconds: float):
+    # Called from the MongoDB command listener; Motor copies the context into its executor threads
+    trace = current_trace.get()
+    if trace is not None:
+        trace.db_seconds += seconds
+        trace.db_calls += 1
+
+
+def add_llm_time(seconds: float):
+    trace = current_trace.get()
+    if trace is not None:
+        trace.llm_seconds += seconds
+        trace.llm_calls += 1
@@ -0,0 +1,145 @@
+// Shared API client: every page talks to the backend through here.
+// GET responses are cached per URL (stale-while-revalidate) and identical
+// requests in flight are shared, so remounting a page does not refetch.
+
+// Set VITE_API_BASE_URL in .env to point the frontend at another backend
+export const API_BASE_URL = (import.meta.env.VITE_API_BASE_URL || "http://localhost:8000").replace(/\/$/, "");
+
+// How long a cached response is served without revalidating
+export const DEFAULT_STALE_TIME = 30 * 1000;
+
+const cache = new Map(); // url -> { data, headers, fetchedAt, stale }
+const inFlight = new Map(); // url -> Promise
+const listeners = new Map(); // url -> Set of callbacks
+// Bumped by every invalidation, so responses fetched across a write are not cached as fresh
+let generation = 0;
+
+export class ApiError extends Error {
+  constructor(message, status) {
+    super(message);
+    this.status = status;
+  }
+}
+
+export function buildUrl(path, params) {
+  const url = new URL(`${API_BASE_URL}${path}`);
+  Object.entries(params || {}).forEach(([key, value]) => {
+    if (value !== undefined && value !== null && value !== "") {
+      url.searchParams.set(key, value);
+    }
+  });
+  return url.toString();
+}
+
+function authHeaders() {
+  const token = localStorage.getItem("token");
+  return token ? { Authorization: `Bearer ${token}` } : {};
+}
+
+async function send(url, { method = "GET", body, headers = {}, form } = {}) {
+  const options = { method, headers: { ...authHeaders(), ...headers } };
+  if (form) {
+    options.headers["Content-Type"] = "application/x-www-form-urlencoded";
+    options.body = new URLSearchParams(form);
+  } else if (body !== undefined) {
+    options.headers["Content-Type"] = "application/json";
+    options.body = JSON.stringify(body);
+  }
+
+  const response = await fetch(url, options);
+  if (!response.ok) {
+    let detail = `Request failed with status ${response.status}`;
+    try {
+      const data = await response.json();
+      if (typeof data.detail === "string") {
+        detail = data.detail;
+      }
+    } catch {
+      // Not a JSON error body
+    }
+    throw new ApiError(detail, response.status);
+  }
+  const data = response.status === 204 ? null : await response.json();
+  return { data, headers: response.headers };
+}
+
+function notify(url) {
+  (listeners.get(url) || []).forEach((listener) => listener(cache.get(url)));
+}
+
+// Fetch a GET url, sharing the request with any identical one in flight
+export function revalidate(url) {
+  if (!inFlight.has(url)) {
+    const startedAt = generation;
+    const promise = send(url)
+      .then(({ data, headers }) => {
+        const entry = { data, headers, fetchedAt: Date.now(), stale: startedAt !== generation };
+        cache.set(url, entry);
+        notify(url);
+        return entry;
+      })
+      .finally(() => inFlight.delete(url));
+    inFlight.set(url, promise);
+  }
+  return inFlight.get(url);
+}
+
+export function getCached(url) {
+  return cache.get(url);
+}
+
+export function isFresh(entry, staleTime = DEFAULT_STALE_TIME) {
+  return Boolean(entry) && !entry.stale && Date.now() - entry.fetchedAt < staleTime;
+}
+
+// Cached GET: resolves with the cached entry when fresh, otherwise fetches it
+export async function fetchQuery(url, { staleTime = DEFAULT_STALE_TIME } = {}) {
+  const entry = cache.get(url);
+  if (isFresh(entry, staleTime)) {
+    return entry;
+  }
+  return revalidate(url);
+}
+
+export function subscribe(url, listener) {
+  if (!listeners.has(url)) {
+    listeners.set(url, new Set());
+  }
+  listeners.get(url).add(listener);
+  return () => listeners.get(url).delete(listener);
+}
+
+// Mark cached responses stale; they are still shown but refetched on next use.
+// Deletes cascade across collections, so by default everything is invalidated.
+export function invalidate(prefix = "") {
+  const base = `${API_BASE_URL}${prefix}`;
+  generation += 1;
+  cache.forEach((entry, url) => {
+    if (url.startsWith(base)) {
+      entry.stale = true;
+    }
+  });
+}
+
+export async function get(path, params) {
+  const { data } = await fetchQuery(buildUrl(path, params));
+  return data;
+}
+
+// Writes bypass the cache and invalidate it
+async function mutate(method, path, body, options = {}) {
+  const { data } = await send(buildUrl(path, options.params), { ...options, method, body });
+  invalidate();
+  return data;
+}
+
+export const post = (path, body, options) => mutate("POST", path, body, options);
+export const put = (path, body, options) => mutate("PUT", path, body, options);
+export const patch = (path, body, options) => mutate("PATCH", path, body, options);
+export const del = (path, options) => mutate("DELETE", path, undefined, options);
+
+// Uncached request, for auth and anything that must not be shared
+export async function request(path, options = {}) {
+  const { data } = await send(buildUrl(path, options.params), options);
+  return data;
+}
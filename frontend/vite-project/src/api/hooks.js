@@ -0,0 +1,137 @@
+import { useCallback, useEffect, useRef, useState } from "react";
+import {
+  DEFAULT_STALE_TIME,
+  buildUrl,
+  fetchQuery,
+  getCached,
+  isFresh,
+  revalidate,
+  subscribe,
+} from "./client";
+
+// Response header with the cursor of the next page (see ListOptions in the backend)
+const NEXT_CURSOR_HEADER = "X-Next-Cursor";
+
+// Cached GET. Cached data is returned at once, even when stale, and
+// revalidated in the background; pass enabled: false to skip the request.
+export function useQuery(path, params, { enabled = true, staleTime = DEFAULT_STALE_TIME } = {}) {
+  const url = enabled && path ? buildUrl(path, params) : null;
+  const [entry, setEntry] = useState(() => (url ? getCached(url) : undefined));
+  const [error, setError] = useState(null);
+  const [validating, setValidating] = useState(false);
+
+  useEffect(() => {
+    if (!url) {
+      setEntry(undefined);
+      return undefined;
+    }
+    let active = true;
+    const cached = getCached(url);
+    setEntry(cached);
+    setError(null);
+    const unsubscribe = subscribe(url, (next) => active && setEntry(next));
+    if (!isFresh(cached, staleTime)) {
+      setValidating(true);
+      revalidate(url)
+        .catch((err) => active && setError(err))
+        .finally(() => active && setValidating(false));
+    }
+    return () => {
+      active = false;
+      unsubscribe();
+    };
+  }, [url, staleTime]);
+
+  const refresh = useCallback(() => (url ? revalidate(url) : Promise.resolve()), [url]);
+
+  return {
+    data: entry?.data,
+    error,
+    loading: Boolean(url) && !entry && !error,
+    validating,
+    refresh,
+  };
+}
+
+// value, once it has stopped changing for delay ms
+export function useDebouncedValue(value, delay = 300) {
+  const [debounced, setDebounced] = useState(value);
+
+  useEffect(() => {
+    const timer = setTimeout(() => setDebounced(value), delay);
+    return () => clearTimeout(timer);
+  }, [value, delay]);
+
+  return debounced;
+}
+
+// Cursor-paginated list: loads pageSize items at a time with loadMore().
+// Each page is a cached query, so returning to a list shows it at once.
+export function useCursorList(path, params, { pageSize = 50 } = {}) {
+  const baseUrl = buildUrl(path, params);
+  const [state, setState] = useState({ items: [], nextCursor: null, loading: true, error: null });
+  const keyRef = useRef(baseUrl);
+  const loadingRef = useRef(false);
+
+  const pageUrl = useCallback(
+    (cursor) => {
+      const url = new URL(baseUrl);
+      url.searchParams.set("limit", pageSize);
+      if (cursor) {
+        url.searchParams.set("cursor", cursor);
+      }
+      return url.toString();
+    },
+    [baseUrl, pageSize]
+  );
+
+  const load = useCallback(
+    async (cursor) => {
+      const key = baseUrl;
+      loadingRef.current = true;
+      setState((current) => ({ ...current, loading: true, error: null }));
+      try {
+        const { data, headers } = await fetchQuery(pageUrl(cursor));
+        if (keyRef.current !== key) return;
+        setState((current) => ({
+          items: cursor ? [...current.items, ...data] : data,
+          nextCursor: headers.get(NEXT_CURSOR_HEADER),
+          loading: false,
+          error: null,
+        }));
+      } catch (error) {
+        if (keyRef.current !== key) return;
+        setState((current) => ({ ...current, loading: false, error }));
+      } finally {
+        if (keyRef.current === key) {
+          loadingRef.current = false;
+        }
+      }
+    },
+    [baseUrl, pageUrl]
+  );
+
+  useEffect(() => {
+    keyRef.current = baseUrl;
+    loadingRef.current = false;
+    // Show the cached first page while it is revalidated
+    const cached = getCached(pageUrl(null));
+    setState({
+      items: cached ? cached.data : [],
+      nextCursor: cached ? cached.headers.get(NEXT_CURSOR_HEADER) : null,
+      loading: true,
+      error: null,
+    });
+    load(null);
+  }, [baseUrl, pageUrl, load]);
+
+  const loadMore = useCallback(() => {
+    if (!loadingRef.current && state.nextCursor) {
+      load(state.nextCursor);
+    }
+  }, [load, state.nextCursor]);
+
+  const reload = useCallback(() => load(null), [load]);
+
+  return { ...state, hasMore: Boolean(state.nextCursor), loadMore, reload };
+}
@@ -1,9 +1,6 @@
 import { Navigate } from "react-router-dom";
 import { useState, useEffect } from "react";
-import axios from "axios";
-
-// API base URL
-const API_BASE_URL = "http://localhost:8000"; // Change this if your backend is on a different URL
+import { request } from "../api/client";
 
 const ProtectedRoute = ({ children }) => {
   const [isAuthenticated, setIsAuthenticated] = useState(null);
@@ -23,11 +20,8 @@ const ProtectedRoute = ({ children }) => {
         }
 
         // Verify token validity by making a request to your auth endpoint
-        const response = await axios.get(`${API_BASE_URL}/auth/me`, {
-          headers: {
-            Authorization: `Bearer ${token}`
-          }
-        });
+        // (the client sends the stored token)
+        await request("/auth/me");
 
         // If the request is successful, the user is authenticated
         setIsAuthenticated(true);
@@ -0,0 +1,73 @@
+import React, { useEffect, useState } from "react";
+
+// Table that renders only the rows in view, so lists of thousands of rows stay
+// responsive. onEndReached is called when the last rows come into view, to load
+// the next page. Rows have a fixed height.
+const VirtualTable = ({
+  columns,
+  rows,
+  rowKey = (row) => row._id,
+  rowHeight = 56,
+  height = 560,
+  overscan = 8,
+  onEndReached,
+  loading = false,
+}) => {
+  const [scrollTop, setScrollTop] = useState(0);
+
+  const start = Math.max(0, Math.floor(scrollTop / rowHeight) - overscan);
+  const end = Math.min(rows.length, Math.ceil((scrollTop + height) / rowHeight) + overscan);
+
+  useEffect(() => {
+    // Also fires when the loaded rows do not fill the table yet
+    if (onEndReached && end >= rows.length - overscan) {
+      onEndReached();
+    }
+  }, [end, rows.length, overscan, onEndReached]);
+
+  return (
+    <div
+      className="bg-white shadow-md rounded overflow-auto"
+      style={{ maxHeight: height }}
+      onScroll={(e) => setScrollTop(e.currentTarget.scrollTop)}
+    >
+      <table className="min-w-full divide-y divide-gray-200">
+        <thead className="bg-gray-50 sticky top-0 z-10">
+          <tr>
+            {columns.map((column) => (
+              <th
+                key={column.key}
+                className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider"
+              >
+                {column.header}
+              </th>
+            ))}
+          </tr>
+        </thead>
+        <tbody className="bg-white divide-y divide-gray-200">
+          {start > 0 && <tr style={{ height: start * rowHeight }} />}
+          {rows.slice(start, end).map((row) => (
+            <tr key={rowKey(row)} style={{ height: rowHeight }} className="hover:bg-gray-50">
+              {columns.map((column) => (
+                <td
+                  key={column.key}
+                  className={column.className || "px-6 py-4 whitespace-nowrap text-sm text-gray-900"}
+                >
+                  {column.render ? column.render(row) : row[column.key]}
+                </td>
+              ))}
+            </tr>
+          ))}
+          {end < rows.length && <tr style={{ height: (rows.length - end) * rowHeight }} />}
+        </tbody>
+      </table>
+      {loading && (
+        <div className="flex justify-center items-center py-4">
+          <div className="animate-spin rounded-full h-6 w-6 border-b-2 border-blue-500"></div>
+        </div>
+      )}
+    </div>
+  );
+};
+
+export default VirtualTable;
@@ -2,6 +2,7 @@ import React, { useState } from 'react';
 import { Eye, EyeOff, UserPlus, Mail, User, Lock } from 'lucide-react';
 import { toast, ToastContainer } from 'react-toastify';
 import 'react-toastify/dist/ReactToastify.css';
+import { request } from '../api/client';
 import { useNavigate } from 'react-router-dom';
 
 const SignupForm = () => {
@@ -24,25 +25,16 @@ const SignupForm = () => {
     }
 
     try {
-      const response = await fetch('http://localhost:8000/auth/register', {
+      await request('/auth/register', {
         method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
+        body: {
           username,
           email,
           password,
           confirm_password: confirmPassword
-        }),
+        },
       });
 
-      const data = await response.json();
-
-      if (!response.ok) {
-        throw new Error(data.detail || 'Registration failed');
-      }
-
       // Show success toast
       toast.success('Registration successful! You can now login.');
 
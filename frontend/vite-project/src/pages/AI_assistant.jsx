@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useRef } from 'react';
-import axios from 'axios';
+import { get, request } from '../api/client';
 
 function HealthAssistant() {
   const [messages, setMessages] = useState([]);
@@ -8,7 +8,6 @@ function HealthAssistant() {
   const [patients, setPatients] = useState([]);
   const [selectedPatient, setSelectedPatient] = useState('');
   const chatEndRef = useRef(null);
-  const API_BASE_URL = 'http://localhost:8000';
 
   // Initialize with welcome message
   useEffect(() => {
@@ -32,8 +31,8 @@ function HealthAssistant() {
   // Fetch patients from the backend
   const fetchPatients = async () => {
     try {
-      const response = await axios.get(`${API_BASE_URL}/patients/`);
-      setPatients(Array.isArray(response.data) ? response.data : []);
+      const data = await get('/patients/', { fields: 'PatientId,name' });
+      setPatients(Array.isArray(data) ? data : []);
     } catch (error) {
       console.error('Error fetching patients:', error);
       // Add sample patients for demonstration in case of error
@@ -59,23 +58,24 @@ function HealthAssistant() {
     setIsLoading(true);
 
     try {
-      let endpoint = `${API_BASE_URL}/ai/query`;
+      let endpoint = '/ai/query';
       let requestData = { query: trimmedInput };
 
       // If a patient is selected, use patient-specific endpoint
       if (selectedPatient) {
-        endpoint = `${API_BASE_URL}/ai/patient/${selectedPatient}/query`;
+        endpoint = `/ai/patient/${selectedPatient}/query`;
         requestData.patient_id = selectedPatient;
       }
 
       // Send query to backend
-      const response = await axios.post(endpoint, requestData);
+      // Queries change nothing, so they do not invalidate the cache
+      const data = await request(endpoint, { method: 'POST', body: requestData });
       
       // Add assistant response to chat
       const assistantMessage = { 
         type: 'assistant', 
-        content: response.data.response, 
-        sources: response.data.sources 
+        content: data.response, 
+        sources: data.sources 
       };
       
       setMessages(prev => [...prev, assistantMessage]);
@@ -1,36 +1,18 @@
-import React, { useEffect, useState } from "react";
+import React, { useState } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import { toast, ToastContainer } from "react-toastify";
 import "react-toastify/dist/ReactToastify.css";
+import { del } from "../api/client";
+import { useQuery } from "../api/hooks";
 
 const AppointmentDetails = () => {
   const { appointmentId } = useParams();
-  const [appointment, setAppointment] = useState(null);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
+  const { data: appointment, loading, error: fetchError } = useQuery(`/appointments/${appointmentId}`);
+  const error = fetchError?.message;
   const [deleting, setDeleting] = useState(false);
   const [showDeleteModal, setShowDeleteModal] = useState(false);
   const navigate = useNavigate();
 
-  useEffect(() => {
-    const fetchAppointmentDetails = async () => {
-      try {
-        const response = await fetch(`http://localhost:8000/appointments/${appointmentId}`);
-        if (!response.ok) {
-          throw new Error("Failed to fetch appointment details");
-        }
-        const data = await response.json();
-        setAppointment(data);
-      } catch (err) {
-        setError(err.message);
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchAppointmentDetails();
-  }, [appointmentId]);
-
   const openDeleteModal = () => {
     setShowDeleteModal(true);
   };
@@ -42,14 +24,7 @@ const AppointmentDetails = () => {
   const handleDelete = async () => {
     setDeleting(true);
     try {
-      const response = await fetch(`http://localhost:8000/appointments/${appointmentId}`, {
-        method: "DELETE",
-      });
-
-      if (!response.ok) {
-        const errorData = await response.json();
-        throw new Error(errorData.detail || "Failed to delete appointment");
-      }
+      await del(`/appointments/${appointmentId}`);
 
       toast.success("Appointment deleted successfully");
       
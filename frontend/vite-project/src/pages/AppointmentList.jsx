@@ -1,30 +1,45 @@
-import React, { useEffect, useState } from "react";
+import React from "react";
 import { useNavigate } from "react-router-dom";
+import { useCursorList } from "../api/hooks";
+import VirtualTable from "../components/VirtualTable";
+
+// Only the columns rendered below
+const APPOINTMENT_FIELDS = { fields: "_id,AppointmentId,PatientId,DoctorId,status" };
+
 const AppointmentList = () => {
-  const [appointments, setAppointments] = useState([]);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
+  const { items: appointments, loading: loadingPage, error: pageError, loadMore } = useCursorList("/appointments/", APPOINTMENT_FIELDS);
   const navigate = useNavigate();
+  const loading = loadingPage && appointments.length === 0;
+  const error = pageError?.message;
 
-  useEffect(() => {
-    const fetchAppointments = async () => {
-      try {
-        setLoading(true);
-        const response = await fetch("http://localhost:8000/appointments/");
-        if (!response.ok) {
-          throw new Error('Failed to fetch appointments');
-        }
-        const data = await response.json();
-        console.log(data);
-        setAppointments(data);
-      } catch (err) {
-        setError(err.message);
-      } finally {
-        setLoading(false);
-      }
-    };
-    fetchAppointments();
-  }, []);
+  const columns = [
+    { key: "PatientId", header: "Patient ID" },
+    { key: "DoctorId", header: "Doctor ID" },
+    {
+      key: "status",
+      header: "Status",
+      className: "px-6 py-4 whitespace-nowrap",
+      render: (appointment) => (
+        <span className={`px-2 inline-flex text-xs leading-5 font-semibold rounded-full 
+          ${appointment.status === 'completed' ? 'bg-green-100 text-green-800' : 
+            appointment.status === 'cancelled' ? 'bg-red-100 text-red-800' : 
+            'bg-blue-100 text-blue-800'}`}>
+          {appointment.status}
+        </span>
+      ),
+    },
+    {
+      key: "actions",
+      header: "Actions",
+      className: "px-6 py-4 whitespace-nowrap text-sm font-medium",
+      render: (appointment) => (
+        <>
+          <button onClick={()=>navigate(`/view-appoinemtmentDetails/${appointment.AppointmentId}`)}className="text-blue-600 hover:text-blue-900 mr-3">View</button>
+          <button onClick={()=>navigate(`/updateStatus/${appointment.AppointmentId}`)}className="text-gray-600 hover:text-gray-900">Edit</button>
+        </>
+      ),
+    },
+  ];
 
   return (
     <div className="max-w-4xl mx-auto p-6">
@@ -49,38 +64,7 @@ const AppointmentList = () => {
       )}
       
       {!loading && !error && appointments.length > 0 && (
-        <div className="bg-white shadow-md rounded overflow-hidden">
-          <table className="min-w-full divide-y divide-gray-200">
-            <thead className="bg-gray-50">
-              <tr>
-                <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Patient ID</th>
-                <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Doctor ID</th>
-                <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Status</th>
-                <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Actions</th>
-              </tr>
-            </thead>
-            <tbody className="bg-white divide-y divide-gray-200">
-              {appointments.map((appointment) => (
-                <tr key={appointment._id} className="hover:bg-gray-50">
-                  <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-900">{appointment.PatientId}</td>
-                  <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-900">{appointment.DoctorId}</td>
-                  <td className="px-6 py-4 whitespace-nowrap">
-                    <span className={`px-2 inline-flex text-xs leading-5 font-semibold rounded-full 
-                      ${appointment.status === 'completed' ? 'bg-green-100 text-green-800' : 
-                        appointment.status === 'cancelled' ? 'bg-red-100 text-red-800' : 
-                        'bg-blue-100 text-blue-800'}`}>
-                      {appointment.status}
-                    </span>
-                  </td>
-                  <td className="px-6 py-4 whitespace-nowrap text-sm font-medium">
-                    <button onClick={()=>navigate(`/view-appoinemtmentDetails/${appointment.AppointmentId}`)}className="text-blue-600 hover:text-blue-900 mr-3">View</button>
-                    <button onClick={()=>navigate(`/updateStatus/${appointment.AppointmentId}`)}className="text-gray-600 hover:text-gray-900">Edit</button>
-                  </td>
-                </tr>
-              ))}
-            </tbody>
-          </table>
-        </div>
+        <VirtualTable columns={columns} rows={appointments} onEndReached={loadMore} loading={loadingPage} />
       )}
     </div>
   );
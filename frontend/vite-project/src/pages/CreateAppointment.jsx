@@ -1,4 +1,5 @@
 import React, { useState } from "react";
+import { post } from "../api/client";
 
 const CreateAppointment = () => {
   const [appointmentId, setAppointmentId] = useState("");
@@ -30,24 +31,16 @@ const CreateAppointment = () => {
     });
 
     try {
-      const response = await fetch("http://localhost:8000/appointments/", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({
-          AppointmentId: appointmentId,
-          PatientId: patientId,
-          DoctorId: doctorId,
-          date: formattedDate,
-          status,
-          notes, // Include notes in the request body
-        }),
-      });
-      console.log(response);
-      if (!response.ok) {
+      await post("/appointments/", {
+        AppointmentId: appointmentId,
+        PatientId: patientId,
+        DoctorId: doctorId,
+        date: formattedDate,
+        status,
+        notes, // Include notes in the request body
+      }).catch(() => {
         throw new Error("Failed to create appointment");
-      }
-
-      await response.json();
+      });
       setSuccess(true);
 
       // Reset form
@@ -1,4 +1,5 @@
 import React, { useState } from "react";
+import { post } from "../api/client";
 
 const CreateDoctor = () => {
   const [doctorId, setDoctorId] = useState(""); // New state for DoctorID
@@ -17,17 +18,10 @@ const CreateDoctor = () => {
     setSuccess(false);
 
     try {
-      const response = await fetch("http://localhost:8000/doctors/", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ DoctorId: doctorId, name, specialization, contact, email }), // Include DoctorID in the request
-      });
-
-      if (!response.ok) {
+      // Include DoctorID in the request
+      await post("/doctors/", { DoctorId: doctorId, name, specialization, contact, email }).catch(() => {
         throw new Error("Failed to create doctor profile");
-      }
-
-      await response.json();
+      });
       setSuccess(true);
 
       // Reset form
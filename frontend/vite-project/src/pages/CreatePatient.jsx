@@ -1,4 +1,5 @@
 import React, { useState } from "react";
+import { post } from "../api/client";
 
 const CreatePatient = () => {
   const [patientId, setPatientId] = useState(""); // New state for patient ID
@@ -20,29 +21,21 @@ const CreatePatient = () => {
     setSuccess(false);
 
     try {
-      const response = await fetch("http://localhost:8000/patients/", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({
-          PatientId:patientId, // Include patient ID in the request
-          name,
-          age,
-          gender,
-          contact,
-          address,
-          blood_type: bloodType, // Include blood type in the request
-          medical_history: medicalHistory, // Include medical history in the request
-        }),
-      });
-      console.log(response.status)
-      if(response.status === 400){
-         throw new Error("Patient with This Id already exists");
-      }
-      if (!response.ok) {
+      await post("/patients/", {
+        PatientId:patientId, // Include patient ID in the request
+        name,
+        age,
+        gender,
+        contact,
+        address,
+        blood_type: bloodType, // Include blood type in the request
+        medical_history: medicalHistory, // Include medical history in the request
+      }).catch((err) => {
+        if (err.status === 400) {
+          throw new Error("Patient with This Id already exists");
+        }
         throw new Error("Failed to create patient record");
-      }
-
-      await response.json();
+      });
       setSuccess(true);
 
       // Reset form
@@ -1,36 +1,18 @@
-import React, { useEffect, useState } from "react";
+import React, { useState } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import { toast, ToastContainer } from "react-toastify";
 import "react-toastify/dist/ReactToastify.css";
+import { del } from "../api/client";
+import { useQuery } from "../api/hooks";
 
 const DoctorDetails = () => {
   const { doctorId } = useParams(); // Extract doctorId from the URL
-  const [doctor, setDoctor] = useState(null);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
+  const { data: doctor, loading, error: fetchError } = useQuery(`/doctors/${doctorId}`);
+  const error = fetchError?.message;
   const [deleting, setDeleting] = useState(false);
   const [showDeleteModal, setShowDeleteModal] = useState(false);
   const navigate = useNavigate();
 
-  useEffect(() => {
-    const fetchDoctorDetails = async () => {
-      try {
-        const response = await fetch(`http://localhost:8000/doctors/${doctorId}`);
-        if (!response.ok) {
-          throw new Error("Failed to fetch doctor details");
-        }
-        const data = await response.json();
-        setDoctor(data);
-      } catch (err) {
-        setError(err.message);
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchDoctorDetails();
-  }, [doctorId]);
-
   const openDeleteModal = () => {
     setShowDeleteModal(true);
   };
@@ -42,14 +24,7 @@ const DoctorDetails = () => {
   const handleDelete = async () => {
     setDeleting(true);
     try {
-      const response = await fetch(`http://localhost:8000/doctors/${doctorId}`, {
-        method: "DELETE",
-      });
-
-      if (!response.ok) {
-        const errorData = await response.json();
-        throw new Error(errorData.detail || "Failed to delete doctor");
-      }
+      await del(`/doctors/${doctorId}`);
 
       toast.success("Doctor deleted successfully");
       
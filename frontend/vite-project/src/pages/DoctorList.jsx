@@ -1,30 +1,34 @@
-import React, { useEffect, useState } from "react";
+import React from "react";
 import { useNavigate } from "react-router-dom";
+import { useCursorList } from "../api/hooks";
+import VirtualTable from "../components/VirtualTable";
+
+// Only the columns rendered below
+const DOCTOR_FIELDS = { fields: "_id,DoctorId,name,specialization" };
 
 const DoctorList = () => {
-  const [doctors, setDoctors] = useState([]);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
+  const { items: doctors, loading: loadingPage, error: pageError, loadMore } = useCursorList("/doctors/", DOCTOR_FIELDS);
   const navigate = useNavigate();
+  const loading = loadingPage && doctors.length === 0;
+  const error = pageError?.message;
 
-  useEffect(() => {
-    const fetchDoctors = async () => {
-      try {
-        setLoading(true);
-        const response = await fetch("http://localhost:8000/doctors/");
-        if (!response.ok) {
-          throw new Error("Failed to fetch doctors");
-        }
-        const data = await response.json();
-        setDoctors(data);
-      } catch (err) {
-        setError(err.message);
-      } finally {
-        setLoading(false);
-      }
-    };
-    fetchDoctors();
-  }, []);
+  const columns = [
+    { key: "name", header: "Name", className: "px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900" },
+    { key: "specialization", header: "Specialization" },
+    { key: "DoctorId", header: "Doctor ID" },
+    {
+      key: "actions",
+      header: "Actions",
+      render: (doctor) => (
+        <button
+          onClick={() => navigate(`/doctors/${doctor.DoctorId}`)}
+          className="bg-blue-500 text-white px-4 py-2 rounded-md hover:bg-blue-600 transition-colors"
+        >
+          View Details
+        </button>
+      ),
+    },
+  ];
 
   if (loading) {
     return (
@@ -43,39 +47,13 @@ const DoctorList = () => {
   }
 
   return (
-    <div className="bg-white rounded-lg shadow-md p-6 max-w-2xl mx-auto">
+    <div className="bg-white rounded-lg shadow-md p-6 max-w-4xl mx-auto">
       <h2 className="text-2xl font-bold text-gray-800 mb-6 border-b pb-2">Doctor List</h2>
       
       {doctors.length === 0 ? (
         <p className="text-gray-500 text-center py-4">No doctors found</p>
       ) : (
-        <ul className="divide-y divide-gray-200">
-          {doctors.map((doctor) => (
-            <li 
-              key={doctor._id}
-              className="py-4 flex items-center hover:bg-gray-50 rounded-md px-3 transition-colors"
-            >
-              <div className="flex-shrink-0">
-                <div className="bg-blue-100 rounded-full p-3">
-                  <svg xmlns="http://www.w3.org/2000/svg" className="h-6 w-6 text-blue-500" fill="none" viewBox="0 0 24 24" stroke="currentColor">
-                    <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M16 7a4 4 0 11-8 0 4 4 0 018 0zM12 14a7 7 0 00-7 7h14a7 7 0 00-7-7z" />
-                  </svg>
-                </div>
-              </div>
-              <div className="ml-4">
-                <p className="text-lg font-medium text-gray-900">{doctor.name}</p>
-                <p className="text-sm text-gray-500">{doctor.specialization}</p>
-                <p className="text-sm text-gray-500">Doctor ID: {doctor.DoctorId}</p>
-              </div>
-              <button
-                onClick={() => navigate(`/doctors/${doctor.DoctorId}`)}
-                className="ml-auto bg-blue-500 text-white px-4 py-2 rounded-md hover:bg-blue-600 transition-colors"
-              >
-                View Details
-              </button>
-            </li>
-          ))}
-        </ul>
+        <VirtualTable columns={columns} rows={doctors} onEndReached={loadMore} loading={loadingPage} />
       )}
     </div>
   );
@@ -1,36 +1,18 @@
-import React, { useEffect, useState } from "react";
+import React, { useState } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import { toast, ToastContainer } from "react-toastify";
 import "react-toastify/dist/ReactToastify.css";
+import { del } from "../api/client";
+import { useQuery } from "../api/hooks";
 
 const PatientDetails = () => {
   const { patientId } = useParams(); // Extract patientId from the URL
-  const [patient, setPatient] = useState(null);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
+  const { data: patient, loading, error: fetchError } = useQuery(`/patients/${patientId}`);
+  const error = fetchError?.message;
   const [deleting, setDeleting] = useState(false);
   const [showDeleteModal, setShowDeleteModal] = useState(false);
   const navigate = useNavigate();
 
-  useEffect(() => {
-    const fetchPatientDetails = async () => {
-      try {
-        const response = await fetch(`http://localhost:8000/patients/${patientId}`);
-        if (!response.ok) {
-          throw new Error("Failed to fetch patient details");
-        }
-        const data = await response.json();
-        setPatient(data);
-      } catch (err) {
-        setError(err.message);
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchPatientDetails();
-  }, [patientId]);
-
   const openDeleteModal = () => {
     setShowDeleteModal(true);
   };
@@ -42,14 +24,7 @@ const PatientDetails = () => {
   const handleDelete = async () => {
     setDeleting(true);
     try {
-      const response = await fetch(`http://localhost:8000/patients/${patientId}`, {
-        method: "DELETE",
-      });
-
-      if (!response.ok) {
-        const errorData = await response.json();
-        throw new Error(errorData.detail || "Failed to delete patient");
-      }
+      await del(`/patients/${patientId}`);
 
       toast.success("Patient deleted successfully");
       
@@ -1,27 +1,18 @@
 import React, { useState } from "react";
+import { useDebouncedValue, useQuery } from "../api/hooks";
 
 const SearchPatients = () => {
   const [query, setQuery] = useState("");
-  const [results, setResults] = useState([]);
-  const [loading, setLoading] = useState(false);
-  const [error, setError] = useState(null);
-
-  const handleSearch = async () => {
-    try {
-      setLoading(true);
-      setError(null);
-      const response = await fetch(`http://localhost:8000/search/patients?query=${query}`);
-      if (!response.ok) {
-        throw new Error("Failed to fetch patients");
-      }
-      const data = await response.json();
-      setResults(data);
-    } catch (err) {
-      setError(err.message);
-    } finally {
-      setLoading(false);
-    }
-  };
+  // Search once typing pauses instead of on every keystroke
+  const debouncedQuery = useDebouncedValue(query.trim(), 300);
+  const { data, loading: searching, error: searchError } = useQuery(
+    "/search/patients",
+    { query: debouncedQuery, fields: "_id,name,contact" },
+    { enabled: debouncedQuery.length > 0 }
+  );
+  const results = debouncedQuery ? data || [] : [];
+  const loading = searching || query.trim() !== debouncedQuery;
+  const error = searchError?.message;
 
   return (
     <div className="bg-white rounded-lg shadow-md p-6 max-w-2xl mx-auto">
@@ -37,12 +28,7 @@ const SearchPatients = () => {
         />
       </div>
 
-      <button
-        onClick={handleSearch}
-        className="w-full bg-blue-500 text-white py-3 rounded-md hover:bg-blue-600 transition-colors"
-      >
-        {loading ? "Searching..." : "Search"}
-      </button>
+      {loading && query.trim() && <p className="text-sm text-gray-500">Searching...</p>}
 
       {error && (
         <div className="bg-red-50 p-4 mt-4 rounded-md">
@@ -2,13 +2,14 @@ import React, { useState } from "react";
 import { useParams } from "react-router-dom";
 import { toast, ToastContainer } from "react-toastify";
 import "react-toastify/dist/ReactToastify.css";
+import { patch } from "../api/client";
 
 const UpdateStatus = () => {
   const { appointmentId } = useParams(); // Extract appointmentId from the URL
   const [patientId, setPatientId] = useState("");
   const [doctorId, setDoctorId] = useState("");
   const [date, setDate] = useState("");
-  const [status, setStatus] = useState("scheduled");
+  const [status, setStatus] = useState("");
   const [notes, setNotes] = useState("");
   const [loading, setLoading] = useState(false);
 
@@ -17,28 +18,34 @@ const UpdateStatus = () => {
     setLoading(true);
 
     try {
-      const response = await fetch(`http://localhost:8000/appointments/${appointmentId}`, {
-        method: "PUT", // Use PATCH for partial updates
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({
-          AppointmentId: appointmentId,
-          PatientId: patientId,
-          DoctorId: doctorId,
-          date,
-          status,
-          notes,
-        }),
-      });
-
-      if (!response.ok) {
-        throw new Error("Failed to update appointment");
+      // Only send the fields that were filled in
+      const changes = {};
+      if (patientId) changes.PatientId = patientId;
+      if (doctorId) changes.DoctorId = doctorId;
+      if (date) changes.date = date;
+      if (notes && !status) changes.notes = notes;
+
+      if (Object.keys(changes).length === 0 && !status) {
+        throw new Error("Nothing to update");
+      }
+
+      if (Object.keys(changes).length > 0) {
+        await patch(`/appointments/${appointmentId}`, changes).catch(() => {
+          throw new Error("Failed to update appointment");
+        });
+      }
+
+      // Status changes go through the transition endpoint (scheduled -> completed/cancelled)
+      if (status) {
+        // The API error (e.g. an invalid transition) is shown as is
+        await patch(`/appointments/${appointmentId}/status`, notes ? { status, notes } : { status });
       }
 
       toast.success("Appointment updated successfully!");
       setPatientId("");
       setDoctorId("");
       setDate("");
-      setStatus("scheduled");
+      setStatus("");
       setNotes("");
     } catch (err) {
       toast.error(err.message || "An error occurred while updating the appointment.");
@@ -60,7 +67,7 @@ const UpdateStatus = () => {
           <input
             id="patientId"
             type="text"
-            placeholder="Enter Patient ID"
+            placeholder="Leave empty to keep the current patient"
             value={patientId}
             onChange={(e) => setPatientId(e.target.value)}
             className="w-full px-4 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
@@ -75,7 +82,7 @@ const UpdateStatus = () => {
           <input
             id="doctorId"
             type="text"
-            placeholder="Enter Doctor ID"
+            placeholder="Leave empty to keep the current doctor"
             value={doctorId}
             onChange={(e) => setDoctorId(e.target.value)}
             className="w-full px-4 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
@@ -107,7 +114,7 @@ const UpdateStatus = () => {
             onChange={(e) => setStatus(e.target.value)}
             className="w-full px-4 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500 bg-white"
           >
-            <option value="scheduled">Scheduled</option>
+            <option value="">Keep current status</option>
             <option value="completed">Completed</option>
             <option value="cancelled">Cancelled</option>
           </select>
@@ -1,11 +1,8 @@
 import { useState, useEffect} from 'react';
 import { Calendar, Clock, Users, User, FileText, Activity, PieChart, Bell, Search } from 'lucide-react';
-import axios from 'axios'; // You'll need to install axios: npm install axios
+import { get } from '../api/client';
 import { useNavigate } from 'react-router-dom';
 
-// API base URL
-const API_BASE_URL = 'http://localhost:8000'; // Change this if your backend is on a different URL
-
 // Helper function to compare dates (only day, month, year)
 function isSameDay(date1, date2) {
   const d1 = new Date(date1);
@@ -78,17 +75,14 @@ export default function MediSyncProDashboard() {
       try {
         setLoading(true);
         
-        // Fetch dashboard stats
-        const statsResponse = await axios.get(`${API_BASE_URL}/dashboard/stats`);
-        
-        // Fetch all doctors
-        const doctorsResponse = await axios.get(`${API_BASE_URL}/doctors/`);
-        
-        // Fetch all appointments
-        const appointmentsResponse = await axios.get(`${API_BASE_URL}/appointments/`);
+        // Fetch dashboard stats, doctors and appointments in parallel, from the cache when fresh
+        const [dashboardStats, doctors, appointments] = await Promise.all([
+          get('/dashboard/stats'),
+          get('/doctors/', { fields: '_id,DoctorId,name,specialization' }),
+          get('/appointments/', { fields: '_id,PatientId,DoctorId,date,notes,status' }),
+        ]);
         
         // Update stats
-        const dashboardStats = statsResponse.data;
         setStats([
           { 
             title: 'Total Patients', 
@@ -117,7 +111,7 @@ export default function MediSyncProDashboard() {
         ]);
         
         // Format doctors data
-        const formattedDoctors = doctorsResponse.data.map(doctor => ({
+        const formattedDoctors = doctors.map(doctor => ({
           name: doctor.name,
           specialty: doctor.specialization,
           patients: 0, // You might need an additional endpoint to get this count
@@ -127,10 +121,10 @@ export default function MediSyncProDashboard() {
         setDoctors(formattedDoctors);
         
         // Format appointments data
-        const formattedAppointments = appointmentsResponse.data.map(appointment => {
+        const formattedAppointments = appointments.map(appointment => {
           // Get patient and doctor details
           const patient = dashboardStats.recent_patients.find(p => p.PatientId === appointment.PatientId) || {};
-          const doctor = doctorsResponse.data.find(d => d.DoctorId === appointment.DoctorId) || {};
+          const doctor = doctors.find(d => d.DoctorId === appointment.DoctorId) || {};
           
           // Store the actual appointment date
           const appointmentDate = new Date(appointment.date);
@@ -194,7 +188,7 @@ export default function MediSyncProDashboard() {
         }));
         
         // Count appointments by type for each month
-        appointmentsResponse.data.forEach(appointment => {
+        appointments.forEach(appointment => {
           const appointmentDate = new Date(appointment.date);
           const monthName = appointmentDate.toLocaleString('default', { month: 'short' });
           const monthIndex = months.indexOf(monthName);